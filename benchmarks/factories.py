@@ -0,0 +1,97 @@
+import random
+from datetime import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from habits.models import Habit
+
+User = get_user_model()
+
+PLACES = ["Дом", "Парк", "Офис", "Спортзал", "Библиотека", "Кухня", "Балкон"]
+ACTIONS = [
+    "бегать",
+    "читать книгу",
+    "медитировать",
+    "пить воду",
+    "делать зарядку",
+    "учить английский",
+    "гулять",
+    "писать дневник",
+]
+REWARDS = ["", "", "кофе", "сериал", "десерт"]
+TIMEZONES = ["Europe/Moscow", "Europe/Berlin", "Asia/Yekaterinburg", "UTC"]
+
+
+class BulkUserFactory:
+    """Массовое создание пользователей (один хеш пароля на всех)"""
+
+    password = "benchpass123"
+
+    @classmethod
+    def create_batch(cls, count, prefix="bench", batch_size=5000):
+        password = make_password(cls.password)
+        rng = random.Random(count)
+        created = 0
+        while created < count:
+            size = min(batch_size, count - created)
+            User.objects.bulk_create(
+                [
+                    User(
+                        email=f"{prefix}{index}@example.com",
+                        username=f"{prefix}{index}",
+                        password=password,
+                        timezone=rng.choice(TIMEZONES),
+                    )
+                    for index in range(created, created + size)
+                ],
+                batch_size=batch_size,
+            )
+            created += size
+        return created
+
+
+class BulkHabitFactory:
+    """Массовое создание привычек без full_clean и сигналов"""
+
+    @staticmethod
+    def build(user_id, rng, **kwargs):
+        return Habit(
+            user_id=user_id,
+            place=kwargs.get("place", rng.choice(PLACES)),
+            time=kwargs.get("time", time(rng.randrange(24), rng.randrange(0, 60, 5))),
+            action=kwargs.get("action", rng.choice(ACTIONS)),
+            is_pleasant=kwargs.get("is_pleasant", False),
+            periodicity=kwargs.get("periodicity", rng.randint(1, 7)),
+            reward=kwargs.get("reward", ""),
+            related_habit=kwargs.get("related_habit"),
+            duration=kwargs.get("duration", rng.randint(1, 120)),
+            is_public=kwargs.get("is_public", rng.random() < 0.3),
+        )
+
+    @classmethod
+    def create_batch(cls, user_ids, per_user, seed=0, batch_size=5000):
+        """Создаёт per_user привычек на пользователя: первая — приятная"""
+        rng = random.Random(seed)
+        created = 0
+        step = max(1, batch_size // per_user)
+        for start in range(0, len(user_ids), step):
+            end = start + step
+            chunk = user_ids[start:end]
+            pleasant = Habit.objects.bulk_create(
+                [cls.build(user_id, rng, is_pleasant=True) for user_id in chunk]
+            )
+            useful = []
+            for habit in pleasant:
+                for _ in range(per_user - 1):
+                    if rng.random() < 0.5:
+                        useful.append(
+                            cls.build(habit.user_id, rng, related_habit=habit)
+                        )
+                    else:
+                        useful.append(
+                            cls.build(habit.user_id, rng, reward=rng.choice(REWARDS))
+                        )
+            Habit.objects.bulk_create(useful, batch_size=batch_size)
+            created += len(pleasant) + len(useful)
+        return created
@@ -0,0 +1,64 @@
+"""Нагрузочный прогон HTTP-эндпоинта: байты на ответ и запросы в секунду.
+
+В отличие от micro.py работает против запущенного сервера (nginx или runserver),
+чтобы учитывать сжатие и кэширование на уровне прокси.
+"""
+
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ENCODINGS = {"identity": "identity", "gzip": "gzip", "br": "br"}
+
+
+def fetch(session, url, headers):
+    """Один запрос; размер тела считается до распаковки (как по сети)"""
+    started = time.perf_counter()
+    response = session.get(url, headers=headers, stream=True)
+    size = len(response.raw.read(decode_content=False))
+    return {
+        "status": response.status_code,
+        "bytes": size,
+        "seconds": time.perf_counter() - started,
+        "cache": response.headers.get("X-Cache-Status", "-"),
+        "encoding": response.headers.get("Content-Encoding", "identity"),
+    }
+
+
+def load_test(url, total=200, concurrency=10, headers=None):
+    """Выполняет total запросов в concurrency потоков и агрегирует результат"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(lambda _: fetch(session, url, headers), range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(sample["seconds"] for sample in samples)
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "rps": round(total / elapsed, 1),
+        "avg_bytes": round(sum(sample["bytes"] for sample in samples) / total, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+        "statuses": dict(Counter(sample["status"] for sample in samples)),
+        "cache": dict(Counter(sample["cache"] for sample in samples)),
+        "encodings": dict(Counter(sample["encoding"] for sample in samples)),
+    }
+
+
+def compare_encodings(url, encodings=("identity", "gzip"), **options):
+    """Прогон одного URL с разными Accept-Encoding"""
+    headers = dict(options.pop("headers", None) or {})
+    results = {}
+    for name in encodings:
+        results[name] = load_test(
+            url, headers={**headers, "Accept-Encoding": ENCODINGS[name]}, **options
+        )
+    return results
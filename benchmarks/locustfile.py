@@ -0,0 +1,103 @@
+"""HTTP-сценарии для Locust.
+
+Запуск на данных из seed_benchmark:
+    pip install locust
+    locust -f benchmarks/locustfile.py --host http://localhost:8000
+"""
+
+import random
+
+from locust import HttpUser, between, task
+
+SEEDED_USERS = 100000
+PASSWORD = "benchpass123"
+
+
+class AuthUser(HttpUser):
+    """Регистрация, вход и обновление токена"""
+
+    wait_time = between(1, 3)
+    weight = 1
+
+    @task
+    def register_and_login(self):
+        suffix = random.getrandbits(48)
+        email = f"locust{suffix}@example.com"
+        self.client.post(
+            "/api/auth/register/",
+            json={
+                "email": email,
+                "username": f"locust{suffix}",
+                "password": PASSWORD,
+                "password_confirm": PASSWORD,
+            },
+            name="/api/auth/register/",
+        )
+        response = self.client.post(
+            "/api/auth/login/", json={"email": email, "password": PASSWORD}
+        )
+        if response.ok:
+            self.client.post(
+                "/api/auth/token/refresh/", json={"refresh": response.json()["refresh"]}
+            )
+
+
+class HabitOwner(HttpUser):
+    """CRUD своих привычек пользователем из засеянного набора"""
+
+    wait_time = between(0.5, 2)
+    weight = 4
+
+    def on_start(self):
+        index = random.randrange(SEEDED_USERS)
+        response = self.client.post(
+            "/api/auth/login/",
+            json={"email": f"bench{index}@example.com", "password": PASSWORD},
+        )
+        token = response.json().get("access", "") if response.ok else ""
+        self.client.headers["Authorization"] = f"Bearer {token}"
+
+    @task(5)
+    def list_habits(self):
+        self.client.get(
+            f"/api/habits/?page={random.randint(1, 2)}", name="/api/habits/"
+        )
+
+    @task(2)
+    def create_update_delete(self):
+        response = self.client.post(
+            "/api/habits/",
+            json={
+                "place": "Парк",
+                "time": "08:00:00",
+                "action": "бегать",
+                "duration": 60,
+                "reward": "кофе",
+            },
+        )
+        if not response.ok:
+            return
+        habit_id = response.json()["id"]
+        self.client.get(f"/api/habits/{habit_id}/", name="/api/habits/{id}/")
+        self.client.patch(
+            f"/api/habits/{habit_id}/", json={"duration": 90}, name="/api/habits/{id}/"
+        )
+        self.client.delete(f"/api/habits/{habit_id}/", name="/api/habits/{id}/")
+
+    @task(1)
+    def agenda(self):
+        self.client.get("/api/habits/agenda/")
+
+
+class PublicVisitor(HttpUser):
+    """Анонимный просмотр публичных привычек"""
+
+    wait_time = between(0.2, 1)
+    weight = 5
+
+    @task
+    def public_habits(self):
+        self.client.get(
+            f"/api/habits/public/?page={random.randint(1, 200)}",
+            name="/api/habits/public/",
+        )
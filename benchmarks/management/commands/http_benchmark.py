@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+
+from benchmarks.http import ENCODINGS, compare_encodings
+from benchmarks.runner import save_results
+
+
+class Command(BaseCommand):
+    help = "Нагрузочный прогон URL с разными Accept-Encoding (сжатие и микрокэш)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            default="http://localhost/api/habits/public/",
+            help="Адрес эндпоинта (через nginx или runserver)",
+        )
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument(
+            "--encodings",
+            nargs="*",
+            choices=sorted(ENCODINGS),
+            default=["identity", "gzip"],
+        )
+        parser.add_argument("--token", help="JWT для прогона в обход микрокэша")
+        parser.add_argument("--output", help="Файл для сохранения результатов")
+
+    def handle(self, *args, **options):
+        headers = {}
+        if options["token"]:
+            headers["Authorization"] = f"Bearer {options['token']}"
+        results = compare_encodings(
+            options["url"],
+            options["encodings"],
+            total=options["requests"],
+            concurrency=options["concurrency"],
+            headers=headers,
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:10} {result['rps']:>8} req/s {result['avg_bytes']:>10} байт/ответ "
+                f"p50 {result['p50_ms']} мс p95 {result['p95_ms']} мс "
+                f"кэш {result['cache']} статусы {result['statuses']}"
+            )
+        if options["output"]:
+            path = save_results(
+                {f"http.{name}": result for name, result in results.items()},
+                options["output"],
+            )
+            self.stdout.write(self.style.SUCCESS(f"Результаты сохранены: {path}"))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.runner import compare, run_benchmarks, save_results
+
+
+class Command(BaseCommand):
+    help = "Запуск микробенчмарков и сохранение результатов в JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--only", nargs="*", help="Префиксы имён бенчмарков (serializers, ...)"
+        )
+        parser.add_argument(
+            "--output", help="Файл результатов (по умолчанию results/<commit>.json)"
+        )
+        parser.add_argument("--compare", help="Файл результатов для сравнения")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=1.2,
+            help="Допустимое замедление относительно --compare",
+        )
+
+    def handle(self, *args, **options):
+        results = run_benchmarks(options["only"])
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:40} median {result['median_us']:>14.3f} мкс "
+                f"(min {result['min_us']:.3f})"
+            )
+        path = save_results(results, options["output"])
+        self.stdout.write(self.style.SUCCESS(f"Результаты сохранены: {path}"))
+
+        if not options["compare"]:
+            return
+        regressions = []
+        for name, ratio in compare(results, options["compare"]).items():
+            style = (
+                self.style.ERROR if ratio > options["threshold"] else self.style.SUCCESS
+            )
+            self.stdout.write(style(f"{name:40} x{ratio}"))
+            if ratio > options["threshold"]:
+                regressions.append(name)
+        if regressions:
+            raise CommandError(f"Замедление: {', '.join(regressions)}")
@@ -0,0 +1,68 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from benchmarks.factories import BulkHabitFactory, BulkUserFactory
+from habits.dispatch import rebuild_dispatch_index
+from habits.models import Habit
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Заполнение БД воспроизводимым набором данных для нагрузочных тестов"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100000)
+        parser.add_argument("--habits-per-user", type=int, default=10)
+        parser.add_argument("--prefix", default="bench")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--flush",
+            action="store_true",
+            help="Удалить ранее созданных пользователей с этим префиксом",
+        )
+        parser.add_argument(
+            "--with-dispatch",
+            action="store_true",
+            help="Построить индекс рассылки для созданных привычек",
+        )
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        users = User.objects.filter(username__startswith=prefix)
+        if options["flush"]:
+            deleted, _ = users.delete()
+            self.stdout.write(f"Удалено объектов: {deleted}")
+
+        started = time.perf_counter()
+        BulkUserFactory.create_batch(
+            options["users"], prefix=prefix, batch_size=options["batch_size"]
+        )
+        user_ids = list(users.order_by("pk").values_list("pk", flat=True))
+        self.stdout.write(
+            f"Пользователи: {len(user_ids)} за {time.perf_counter() - started:.1f} с"
+        )
+
+        started = time.perf_counter()
+        habits = BulkHabitFactory.create_batch(
+            user_ids,
+            options["habits_per_user"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(
+            f"Привычки: {habits} за {time.perf_counter() - started:.1f} с"
+        )
+
+        if options["with_dispatch"]:
+            started = time.perf_counter()
+            rebuilt = rebuild_dispatch_index(Habit.objects.filter(user__in=users))
+            self.stdout.write(
+                f"Слоты рассылки: {rebuilt} привычек "
+                f"за {time.perf_counter() - started:.1f} с"
+            )
+
+        self.stdout.write(self.style.SUCCESS("Набор данных готов"))
@@ -0,0 +1,258 @@
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from io import BytesIO
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from bot.models import TelegramUser
+from config.renderers import FastJSONParser, FastJSONRenderer
+from habits.deadletter import dead_letter
+from habits.dispatch import rebuild_dispatch_index
+from habits.models import Habit
+from habits.scheduling import expand_occurrences
+from habits.search import search_habits
+from habits.serializers import (HABIT_READ_COLUMNS, HabitSerializer,
+                                serialize_habit_rows)
+from habits.tasks import (render_reminder, replay_dead_letters,
+                          send_telegram_reminder)
+
+from .factories import BulkHabitFactory, BulkUserFactory
+from .runner import benchmark
+
+User = get_user_model()
+
+
+def sample_habits(count):
+    """Несохранённые привычки с заполненными полями для сериализации"""
+    now = timezone.now()
+    return [
+        Habit(
+            id=index,
+            user_id=1,
+            place="Парк",
+            time=datetime(2025, 1, 1, 8, index % 60).time(),
+            action="бегать по утрам",
+            is_pleasant=False,
+            periodicity=index % 7 + 1,
+            reward="" if index % 2 else "кофе",
+            duration=60,
+            is_public=True,
+            created_at=now,
+            updated_at=now,
+        )
+        for index in range(1, count + 1)
+    ]
+
+
+def habit_list_payload(count):
+    rows = [
+        tuple(
+            getattr(habit, "related_habit_id" if column == "related_habit" else column)
+            for column in HABIT_READ_COLUMNS
+        )
+        for habit in sample_habits(count)
+    ]
+    return {"count": count, "next": None, "previous": None, "results": rows}
+
+
+def habit_list_response(count):
+    """Тело ответа HabitViewSet.list на count привычек"""
+    payload = habit_list_payload(count)
+    return {**payload, "results": serialize_habit_rows(payload["results"])}
+
+
+@benchmark("serializers.habit_list_500", number=20)
+@contextmanager
+def habit_list_serialization():
+    habits = sample_habits(500)
+    yield lambda: HabitSerializer(habits, many=True).data
+
+
+@benchmark("serializers.habit_rows_500", number=20)
+@contextmanager
+def habit_rows_serialization():
+    rows = habit_list_payload(500)["results"]
+    yield lambda: serialize_habit_rows(rows)
+
+
+@benchmark("renderers.habit_list_1000_stdlib", number=20)
+@contextmanager
+def habit_list_stdlib_rendering():
+    payload = habit_list_response(1000)
+    renderer = JSONRenderer()
+    yield lambda: renderer.render(payload, "application/json")
+
+
+@benchmark("renderers.habit_list_1000_fast", number=20)
+@contextmanager
+def habit_list_fast_rendering():
+    payload = habit_list_response(1000)
+    renderer = FastJSONRenderer()
+    yield lambda: renderer.render(payload, "application/json")
+
+
+@benchmark("parsers.habit_bulk_1000_stdlib", number=20)
+@contextmanager
+def habit_bulk_stdlib_parsing():
+    body = JSONRenderer().render(habit_list_response(1000)["results"])
+    parser = JSONParser()
+    yield lambda: parser.parse(BytesIO(body))
+
+
+@benchmark("parsers.habit_bulk_1000_fast", number=20)
+@contextmanager
+def habit_bulk_fast_parsing():
+    body = JSONRenderer().render(habit_list_response(1000)["results"])
+    parser = FastJSONParser()
+    yield lambda: parser.parse(BytesIO(body))
+
+
+@benchmark("serializers.habit_validate", number=500)
+@contextmanager
+def habit_validation():
+    payload = {
+        "place": "Парк",
+        "time": "08:00:00",
+        "action": "бегать",
+        "is_pleasant": False,
+        "periodicity": 1,
+        "reward": "кофе",
+        "duration": 120,
+    }
+    context = {"request": SimpleNamespace(user=AnonymousUser())}
+    yield lambda: HabitSerializer(data=payload, context=context).is_valid()
+
+
+@benchmark("validators.habit_clean", number=2000)
+@contextmanager
+def habit_model_validation():
+    habit = sample_habits(1)[0]
+
+    def validate():
+        habit.clean_fields(exclude=["user", "related_habit"])
+        habit.clean()
+
+    yield validate
+
+
+@benchmark("scheduling.expand_100k_year", number=1, repeat=3)
+@contextmanager
+def schedule_expansion():
+    rng = np.random.default_rng(42)
+    anchors = np.datetime64("2024-01-01") + rng.integers(0, 700, 100000)
+    periodicities = rng.integers(1, 8, 100000)
+    yield lambda: expand_occurrences(anchors, periodicities, "2025-01-01", "2025-12-31")
+
+
+@benchmark("reminder.render", number=5000)
+@contextmanager
+def reminder_rendering():
+    habit = sample_habits(1)[0]
+    yield lambda: render_reminder(habit)
+
+
+@benchmark("reminder.task_200_due", number=3, repeat=3)
+@contextmanager
+def reminder_task():
+    """Полный тик рассылки на 200 привычках (Telegram замокан, данные откатываются)"""
+    zone = ZoneInfo("Europe/Moscow")
+    with transaction.atomic():
+        BulkUserFactory.create_batch(200, prefix="bench-reminder")
+        users = list(User.objects.filter(username__startswith="bench-reminder"))
+        TelegramUser.objects.bulk_create(
+            [TelegramUser(user=user, chat_id=f"bench-{user.pk}") for user in users]
+        )
+        Habit.objects.bulk_create(
+            [
+                Habit(
+                    user=user,
+                    place="Дом",
+                    time=time(8, 0),
+                    action="пить воду",
+                    duration=30,
+                )
+                for user in users
+            ]
+        )
+        User.objects.filter(pk__in=[user.pk for user in users]).update(
+            timezone="Europe/Moscow"
+        )
+        rebuild_dispatch_index(Habit.objects.filter(user__in=users))
+
+        moment = datetime.combine(
+            timezone.localdate(timezone.now(), zone) + timedelta(days=1),
+            time(8, 0),
+            tzinfo=zone,
+        )
+        response = Mock(status_code=200)
+        with (
+            patch("requests.post", return_value=response),
+            patch("habits.tasks.timezone.now", return_value=moment),
+        ):
+            yield send_telegram_reminder
+        transaction.set_rollback(True)
+
+
+@contextmanager
+def public_habits_100k():
+    """100 000 привычек (около 30% публичных) в транзакции, которая откатывается"""
+    with transaction.atomic():
+        BulkUserFactory.create_batch(1000, prefix="bench-search")
+        user_ids = list(
+            User.objects.filter(username__startswith="bench-search").values_list(
+                "pk", flat=True
+            )
+        )
+        BulkHabitFactory.create_batch(user_ids, 100, seed=3)
+        yield Habit.objects.filter(is_public=True)
+        transaction.set_rollback(True)
+
+
+def search_page(queryset):
+    results = search_habits(queryset, "бег парк")
+    return results.count(), list(results.values_list(*HABIT_READ_COLUMNS)[:20])
+
+
+@benchmark("search.public_100k_fts", number=20, repeat=3)
+@contextmanager
+def search_fts():
+    with public_habits_100k() as queryset:
+        yield lambda: search_page(queryset)
+
+
+@benchmark("search.public_100k_icontains", number=20, repeat=3)
+@contextmanager
+def search_icontains():
+    """Для сравнения: поиск без полнотекстового индекса"""
+    with public_habits_100k() as queryset:
+        with patch("habits.search.fts_available", return_value=False):
+            yield lambda: search_page(queryset)
+
+
+@benchmark("reminder.dlq_replay_1000", number=3, repeat=3)
+@contextmanager
+def dlq_replay():
+    """Повтор 1000 недоставленных сообщений в процессе (Redis — fakeredis, Telegram замокан)"""
+    import fakeredis
+
+    client = fakeredis.FakeRedis(decode_responses=True)
+
+    def replay():
+        for index in range(1000):
+            dead_letter(str(index), "Напоминание о привычке!", [index], "502", 5)
+        return replay_dead_letters(batch_size=500, enqueue=False)
+
+    with (
+        patch("habits.deadletter.get_redis", return_value=client),
+        patch("requests.post", return_value=Mock(status_code=200)),
+    ):
+        yield replay
@@ -0,0 +1,81 @@
+"""Задержка напоминания при конкурирующей пакетной нагрузке.
+
+Celery в процессе с брокером в памяти: тяжёлые задачи имитируются sleep, а
+маршруты и очереди берутся из настроек проекта. Замер — время от постановки
+тика рассылки за 50 пакетными задачами до его выполнения.
+"""
+
+import time
+from contextlib import ExitStack, contextmanager
+
+from celery import Celery
+from celery.contrib.testing.worker import start_worker
+from django.conf import settings
+
+from .runner import benchmark
+
+BULK_TASKS = 50
+BULK_TASK_SECONDS = 0.02
+
+
+def bench_app(routed):
+    app = Celery("benchmarks", set_as_current=False)
+    app.conf.update(
+        broker_url="memory://",
+        result_backend="cache+memory://",
+        broker_transport_options={"polling_interval": 0.005},
+        task_default_queue=settings.CELERY_TASK_DEFAULT_QUEUE,
+        worker_prefetch_multiplier=settings.CELERY_WORKER_PREFETCH_MULTIPLIER,
+    )
+    if routed:
+        app.conf.update(
+            task_queues=settings.CELERY_TASK_QUEUES,
+            task_routes=settings.CELERY_TASK_ROUTES,
+        )
+
+    @app.task(name="habits.tasks.recalculate_habit_stats")
+    def bulk():
+        time.sleep(BULK_TASK_SECONDS)
+
+    @app.task(name="habits.tasks.send_telegram_reminder")
+    def reminder():
+        pass
+
+    return app, bulk, reminder
+
+
+@contextmanager
+def reminder_latency(routed):
+    app, bulk, reminder = bench_app(routed)
+    # Как в docker-compose: у напоминаний свой worker, остальное — у второго
+    queues = (
+        [["reminders"], ["bulk", "maintenance", "default"]] if routed else [["default"]]
+    )
+
+    def run():
+        for _ in range(BULK_TASKS):
+            bulk.delay()
+        reminder.delay().get(timeout=60, interval=0.005)
+
+    with ExitStack() as stack:
+        for names in queues:
+            stack.enter_context(
+                start_worker(
+                    app,
+                    queues=names,
+                    concurrency=1,
+                    perform_ping_check=False,
+                    shutdown_timeout=60,
+                )
+            )
+        yield run
+
+
+@benchmark("celery.reminder_latency_shared", number=1, repeat=5)
+def reminder_latency_shared():
+    return reminder_latency(routed=False)
+
+
+@benchmark("celery.reminder_latency_routed", number=1, repeat=5)
+def reminder_latency_routed():
+    return reminder_latency(routed=True)
@@ -0,0 +1,101 @@
+import json
+import logging
+import platform
+import subprocess
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# Имя бенчмарка -> (фабрика контекстного менеджера, число вызовов, повторы)
+BENCHMARKS = {}
+
+
+def benchmark(name, number=100, repeat=5):
+    """Регистрирует бенчмарк.
+
+    Декорируемая функция — контекстный менеджер, который готовит данные и
+    отдаёт замеряемый callable.
+    """
+
+    def decorator(factory):
+        BENCHMARKS[name] = (factory, number, repeat)
+        return factory
+
+    return decorator
+
+
+def measure(func, number, repeat):
+    timings = sorted(
+        t / number for t in timeit.repeat(func, number=number, repeat=repeat)
+    )
+    return {
+        "number": number,
+        "repeat": repeat,
+        "min_us": round(timings[0] * 1e6, 3),
+        "median_us": round(timings[len(timings) // 2] * 1e6, 3),
+        "max_us": round(timings[-1] * 1e6, 3),
+    }
+
+
+def run_benchmarks(prefixes=None):
+    from . import micro, queues, startup  # noqa: F401  регистрация бенчмарков
+
+    results = {}
+    # Логи рассылки искажают замеры и засоряют вывод
+    logging.disable(logging.INFO)
+    try:
+        for name, (factory, number, repeat) in BENCHMARKS.items():
+            if prefixes and not any(name.startswith(prefix) for prefix in prefixes):
+                continue
+            with factory() as func:
+                results[name] = measure(func, number, repeat)
+    finally:
+        logging.disable(logging.NOTSET)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def environment():
+    return {
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "database": connection.vendor,
+    }
+
+
+def save_results(results, path=None):
+    payload = {"environment": environment(), "benchmarks": results}
+    if path is None:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        path = RESULTS_DIR / f"{payload['environment']['revision']}.json"
+    Path(path).write_text(json.dumps(payload, indent=2, ensure_ascii=False))
+    return path
+
+
+def compare(results, baseline_path):
+    """Отношение медиан текущего прогона к сохранённому (>1 — медленнее)"""
+    baseline = json.loads(Path(baseline_path).read_text())["benchmarks"]
+    return {
+        name: round(result["median_us"] / baseline[name]["median_us"], 3)
+        for name, result in results.items()
+        if name in baseline and baseline[name]["median_us"]
+    }
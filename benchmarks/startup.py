@@ -0,0 +1,49 @@
+"""Холодный старт процессов по ролям: отдельный интерпретатор на каждый замер."""
+
+import os
+import subprocess
+import sys
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from .runner import benchmark
+
+ROLES = {
+    "web": (
+        "config.settings",
+        "import django; django.setup(); import config.urls",
+    ),
+    "worker": (
+        "config.settings_worker",
+        "import django; django.setup(); from config.celery import app; "
+        "app.loader.import_default_modules()",
+    ),
+    "worker_web_settings": (
+        "config.settings",
+        "import django; django.setup(); from config.celery import app; "
+        "app.loader.import_default_modules()",
+    ),
+    "bot": (
+        "config.settings_bot",
+        "import django; django.setup(); import bot.management.commands.start_bot",
+    ),
+}
+
+
+def start_process(settings_module, code):
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings_module}
+    subprocess.run(
+        [sys.executable, "-c", code], cwd=settings.BASE_DIR, env=env, check=True
+    )
+
+
+def _register(role, settings_module, code):
+    @benchmark(f"startup.{role}", number=1, repeat=5)
+    @contextmanager
+    def startup():
+        yield lambda: start_process(settings_module, code)
+
+
+for role, (settings_module, code) in ROLES.items():
+    _register(role, settings_module, code)
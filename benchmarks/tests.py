@@ -0,0 +1,67 @@
+import json
+import tempfile
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from habits.models import Habit
+
+from .factories import BulkHabitFactory, BulkUserFactory
+from .http import load_test
+from .runner import compare, measure, save_results
+
+User = get_user_model()
+
+
+class BulkFactoryTest(TestCase):
+    """Тесты для массовых фабрик набора данных"""
+
+    def test_create_batch(self):
+        """Тест воспроизводимого создания пользователей и привычек"""
+        self.assertEqual(BulkUserFactory.create_batch(10, batch_size=4), 10)
+        user_ids = list(User.objects.values_list("pk", flat=True))
+
+        created = BulkHabitFactory.create_batch(user_ids, 3, seed=1, batch_size=6)
+
+        self.assertEqual(created, 30)
+        self.assertEqual(Habit.objects.filter(is_pleasant=True).count(), 10)
+        for habit in Habit.objects.filter(related_habit__isnull=False):
+            self.assertTrue(habit.related_habit.is_pleasant)
+            self.assertEqual(habit.related_habit.user_id, habit.user_id)
+
+
+class BenchmarkRunnerTest(TestCase):
+    """Тесты для сохранения и сравнения результатов"""
+
+    def test_save_and_compare(self):
+        """Тест сравнения с сохранённым прогоном"""
+        results = {"noop": measure(lambda: sum(range(1000)), number=10, repeat=3)}
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = save_results(results, Path(directory) / "base.json")
+            payload = json.loads(Path(path).read_text())
+            self.assertIn("revision", payload["environment"])
+
+            slower = {"noop": dict(results["noop"])}
+            slower["noop"]["median_us"] = results["noop"]["median_us"] * 2
+            self.assertEqual(compare(slower, path)["noop"], 2.0)
+
+
+class HTTPBenchmarkTest(TestCase):
+    """Тесты для нагрузочного прогона HTTP"""
+
+    def test_load_test_counts_wire_bytes(self):
+        """Тест: размер ответа считается по сжатому телу"""
+        response = Mock(status_code=200, headers={"Content-Encoding": "gzip"})
+        response.raw.read.return_value = b"x" * 120
+
+        with patch("requests.Session.get", return_value=response) as get:
+            result = load_test("http://testserver/", total=4, concurrency=2)
+
+        self.assertEqual(result["avg_bytes"], 120)
+        self.assertEqual(result["statuses"], {200: 4})
+        self.assertEqual(result["encodings"], {"gzip": 4})
+        response.raw.read.assert_called_with(decode_content=False)
+        self.assertEqual(get.call_count, 4)
@@ -0,0 +1,70 @@
+import re
+import secrets
+
+from django.conf import settings
+from django.db import transaction
+
+from config.redis import get_redis
+
+from .models import TelegramUser
+
+# Одноразовый токен привязки -> id пользователя
+LINK_TOKEN_KEY = "bot:link:token:{}"
+# id пользователя -> последний выданный токен (старый отзывается при выдаче нового)
+USER_TOKEN_KEY = "bot:link:user:{}"
+# secrets.token_urlsafe(16): 22 символа base64url; прочее из /start в Redis не идёт
+TOKEN_RE = re.compile(r"[A-Za-z0-9_-]{22}")
+
+# Выдача токена одним скриптом: два одновременных запроса не оставят двух
+# действующих токенов. KEYS: токен пользователя, новый токен;
+# ARGV: токен, id пользователя, TTL, префикс ключей токенов
+CREATE_TOKEN_SCRIPT = """
+local previous = redis.call('GET', KEYS[1])
+if previous then
+    redis.call('DEL', ARGV[4] .. previous)
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[3])
+redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[3])
+"""
+
+
+def create_link_token(user):
+    """Выдаёт одноразовый токен для /start; действует TELEGRAM_LINK_TTL секунд"""
+    token = secrets.token_urlsafe(16)
+    get_redis().eval(
+        CREATE_TOKEN_SCRIPT,
+        2,
+        USER_TOKEN_KEY.format(user.pk),
+        LINK_TOKEN_KEY.format(token),
+        token,
+        user.pk,
+        settings.TELEGRAM_LINK_TTL,
+        LINK_TOKEN_KEY.format(""),
+    )
+    return token
+
+
+def link_url(token):
+    """Ссылка на бота, которая сразу отправляет /start с токеном"""
+    if not settings.TELEGRAM_BOT_USERNAME:
+        return None
+    return f"https://t.me/{settings.TELEGRAM_BOT_USERNAME}?start={token}"
+
+
+def consume_link_token(token):
+    """id пользователя по токену или None; токен удаляется при первом чтении"""
+    if not TOKEN_RE.fullmatch(token):
+        return None
+    user_id = get_redis().getdel(LINK_TOKEN_KEY.format(token))
+    return int(user_id) if user_id else None
+
+
+@transaction.atomic
+def link_chat(user_id, chat_id, username=""):
+    """Привязывает чат к пользователю; чат, привязанный к другому аккаунту, переходит"""
+    chat_id = str(chat_id)
+    TelegramUser.objects.filter(chat_id=chat_id).exclude(user_id=user_id).delete()
+    _, created = TelegramUser.objects.update_or_create(
+        user_id=user_id, defaults={"chat_id": chat_id, "username": username or ""}
+    )
+    return created
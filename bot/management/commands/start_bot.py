@@ -1,12 +1,13 @@
 from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
+from django.utils import timezone
 from telegram.ext import Application, CommandHandler, MessageHandler, filters
 
+from bot.linking import consume_link_token, link_chat
 from bot.models import TelegramUser
-
-User = get_user_model()
+from habits.models import Habit
+from habits.scheduling import build_agenda
 
 
 class Command(BaseCommand):
@@ -28,6 +29,7 @@ class Command(BaseCommand):
             )
 
             application.add_handler(CommandHandler("start", start))
+            application.add_handler(CommandHandler("today", today))
             application.add_handler(
                 MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message)
             )
@@ -47,22 +49,24 @@ async def start(update, context):
     user = update.effective_user
     chat_id = update.message.chat_id
 
-    try:
-        # Ищем пользователя по username в Telegram
-        django_user = await sync_to_async(
-            User.objects.filter(username=user.username).first
-        )()
+    if not context.args:
+        await update.message.reply_text(
+            f"Привет, {user.first_name}! Чтобы привязать аккаунт, получи ссылку "
+            f"в профиле на сайте (POST /api/auth/profile/telegram-link/) и открой её "
+            f"или отправь /start <токен>."
+        )
+        return
 
-        if not django_user:
+    try:
+        # Одноразовый токен из профиля: один ключ в Redis вместо поиска по username
+        user_id = await sync_to_async(consume_link_token)(context.args[0])
+        if user_id is None:
             await update.message.reply_text(
-                f"Привет {user.first_name}! Сначала зарегистрируйся на нашем сайте "
-                f"с username: {user.username}, затем используй /start снова."
+                "Ссылка недействительна или устарела. Получи новую в профиле на сайте."
             )
             return
 
-        telegram_user, created = await sync_to_async(
-            TelegramUser.objects.update_or_create
-        )(user=django_user, defaults={"chat_id": chat_id, "username": user.username})
+        created = await sync_to_async(link_chat)(user_id, chat_id, user.username)
 
         if created:
             await update.message.reply_text(
@@ -71,12 +75,39 @@ async def start(update, context):
             )
         else:
             await update.message.reply_text(
-                f"С возвращением, {user.first_name}! Аккаунт уже привязан."
+                f"С возвращением, {user.first_name}! Привязка аккаунта обновлена."
             )
 
     except Exception as e:
         await update.message.reply_text(f"Ошибка: {e}")
 
 
+async def today(update, context):
+    chat_id = update.message.chat_id
+
+    telegram_user = await sync_to_async(
+        TelegramUser.objects.filter(chat_id=str(chat_id)).first
+    )()
+    if not telegram_user:
+        await update.message.reply_text("Сначала привяжи аккаунт командой /start.")
+        return
+
+    day = timezone.localdate()
+    agenda = await sync_to_async(build_agenda)(
+        Habit.objects.filter(user_id=telegram_user.user_id), day, day
+    )
+    if not agenda:
+        await update.message.reply_text("На сегодня привычек нет.")
+        return
+
+    lines = [
+        f"{item['time'].strftime('%H:%M')} — {item['action']} ({item['place']})"
+        for item in agenda
+    ]
+    await update.message.reply_text("Привычки на сегодня:\n\n" + "\n".join(lines))
+
+
 async def handle_message(update, context):
-    await update.message.reply_text("Используй /start для привязки аккаунта.")
+    await update.message.reply_text(
+        "Используй /start для привязки аккаунта и /today для списка привычек."
+    )
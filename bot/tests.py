@@ -1,7 +1,17 @@
+from unittest.mock import AsyncMock, Mock, patch
+
+import fakeredis
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 from faker import Faker
+from rest_framework import status
+from rest_framework.test import APITestCase
 
+from .linking import (LINK_TOKEN_KEY, USER_TOKEN_KEY, consume_link_token,
+                      create_link_token, link_chat)
+from .management.commands.start_bot import start
 from .models import TelegramUser
 
 User = get_user_model()
@@ -62,3 +72,104 @@ class TelegramUserModelTest(TestCase):
 
         self.assertFalse(created)
         self.assertEqual(telegram_user.chat_id, "111111111")
+
+
+class TelegramLinkTest(APITestCase):
+    """Тесты привязки Telegram по одноразовому токену"""
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        patcher = patch("bot.linking.get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(
+            email="link@example.com", username="linkuser", password="testpass123"
+        )
+
+    def update(self, chat_id=555, username="tg_user"):
+        message = Mock(chat_id=chat_id, reply_text=AsyncMock())
+        return Mock(
+            effective_user=Mock(first_name="Иван", username=username), message=message
+        )
+
+    def test_profile_issues_token(self):
+        """Тест выдачи токена в профиле; новый токен отзывает предыдущий"""
+        self.client.force_authenticate(user=self.user)
+
+        first = self.client.post("/api/auth/profile/telegram-link/").data["token"]
+        response = self.client.post("/api/auth/profile/telegram-link/")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["expires_in"], settings.TELEGRAM_LINK_TTL)
+        self.assertIsNone(consume_link_token(first))
+        self.assertEqual(consume_link_token(response.data["token"]), self.user.pk)
+
+    def test_profile_link_requires_auth(self):
+        """Тест: токен выдаётся только авторизованному пользователю"""
+        response = self.client.post("/api/auth/profile/telegram-link/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_token_is_one_time(self):
+        """Тест: токен действует один раз и живёт TELEGRAM_LINK_TTL секунд"""
+        token = create_link_token(self.user)
+
+        self.assertLessEqual(
+            self.redis.ttl(LINK_TOKEN_KEY.format(token)), settings.TELEGRAM_LINK_TTL
+        )
+        self.assertEqual(consume_link_token(token), self.user.pk)
+        self.assertIsNone(consume_link_token(token))
+
+    def test_malformed_token_does_not_touch_redis(self):
+        """Тест: строка не в формате токена не трогает ключи других пользователей"""
+        create_link_token(self.user)
+        user_key = USER_TOKEN_KEY.format(self.user.pk)
+
+        self.assertIsNone(consume_link_token(f"user:{self.user.pk}"))
+        self.assertIsNone(consume_link_token("../" * 8))
+        self.assertTrue(self.redis.exists(user_key))
+
+    def test_single_live_token_per_user(self):
+        """Тест: после повторной выдачи действует только последний токен"""
+        tokens = [create_link_token(self.user) for _ in range(3)]
+
+        self.assertEqual(
+            self.redis.keys(LINK_TOKEN_KEY.format("*")),
+            [LINK_TOKEN_KEY.format(tokens[-1])],
+        )
+        self.assertEqual(
+            self.redis.get(USER_TOKEN_KEY.format(self.user.pk)), tokens[-1]
+        )
+
+    async def test_start_links_chat(self):
+        """Тест: /start <токен> привязывает чат к владельцу токена"""
+        token = await sync_to_async(create_link_token)(self.user)
+        update = self.update()
+
+        await start(update, Mock(args=[token]))
+
+        telegram_user = await TelegramUser.objects.aget(user=self.user)
+        self.assertEqual(telegram_user.chat_id, "555")
+        self.assertEqual(telegram_user.username, "tg_user")
+        self.assertIn("Аккаунт привязан", update.message.reply_text.call_args.args[0])
+
+    async def test_start_with_invalid_token(self):
+        """Тест: неизвестный токен не привязывает чат"""
+        update = self.update()
+
+        await start(update, Mock(args=["unknown"]))
+
+        self.assertFalse(await TelegramUser.objects.aexists())
+        self.assertIn("недействительна", update.message.reply_text.call_args.args[0])
+
+    def test_chat_moves_to_new_account(self):
+        """Тест: чат, привязанный к другому аккаунту, переходит к новому"""
+        other = User.objects.create_user(
+            email="other@example.com", username="otheruser", password="testpass123"
+        )
+        TelegramUser.objects.create(user=other, chat_id="555")
+
+        self.assertTrue(link_chat(self.user.pk, 555, "tg_user"))
+        self.assertFalse(link_chat(self.user.pk, 555, "tg_user"))
+
+        self.assertEqual(TelegramUser.objects.get(chat_id="555").user, self.user)
+        self.assertEqual(TelegramUser.objects.count(), 1)
@@ -0,0 +1,257 @@
+"""Планировщик Celery beat с выбором лидера и расписанием в Redis.
+
+Реплик beat может быть несколько: задачи отправляет только держатель
+блокировки, остальные проверяют её и перехватывают, когда истекает TTL.
+Расписание хранится в Redis и перечитывается при смене версии, время
+последнего запуска общее для реплик, поэтому новый лидер продолжает с того же
+места и не повторяет уже отправленные задачи.
+"""
+
+import json
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from celery.beat import Scheduler
+from celery.schedules import crontab, schedule
+from django.conf import settings
+from redis.exceptions import RedisError
+
+from .redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Блокировка лидера: значение — идентификатор реплики
+LOCK_KEY = "beat:leader"
+# Имя записи -> JSON {task, schedule, args, kwargs, options, enabled}
+SCHEDULE_KEY = "beat:schedule"
+# Счётчик изменений расписания: реплики перечитывают его при смене версии
+VERSION_KEY = "beat:schedule:version"
+# Имя записи -> время последней отправки (unix timestamp)
+LAST_RUN_KEY = "beat:last_run"
+# Версия расписания, которое ещё не загружено
+STALE = object()
+
+# Продление своей блокировки или захват свободной
+ACQUIRE_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if current == ARGV[1] then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return 1
+end
+if not current then
+    redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    return 1
+end
+return 0
+"""
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def parse_schedule(value):
+    """Cron-строка «минута час день месяц день_недели» или интервал в секундах"""
+    if isinstance(value, (int, float)):
+        return schedule(timedelta(seconds=value))
+    fields = value.split()
+    if len(fields) != 5:
+        raise ValueError(f"Ожидается cron из 5 полей: {value!r}")
+    minute, hour, day_of_month, month_of_year, day_of_week = fields
+    return crontab(
+        minute=minute,
+        hour=hour,
+        day_of_week=day_of_week,
+        day_of_month=day_of_month,
+        month_of_year=month_of_year,
+    )
+
+
+def normalize_entry(spec):
+    """Проверяет запись расписания и дополняет значения по умолчанию"""
+    entry = {
+        "task": spec["task"],
+        "schedule": spec["schedule"],
+        "args": list(spec.get("args", [])),
+        "kwargs": dict(spec.get("kwargs", {})),
+        "options": dict(spec.get("options", {})),
+        "enabled": bool(spec.get("enabled", True)),
+    }
+    parse_schedule(entry["schedule"])
+    return entry
+
+
+def seed_schedule(overwrite=False):
+    """Копирует BEAT_SCHEDULE из настроек в Redis.
+
+    Без overwrite существующие (отредактированные) записи не меняются.
+    Возвращает число записанных записей.
+    """
+    client = get_redis()
+    pipe = client.pipeline(transaction=True)
+    for name, spec in settings.BEAT_SCHEDULE.items():
+        raw = json.dumps(normalize_entry(spec), ensure_ascii=False)
+        if overwrite:
+            pipe.hset(SCHEDULE_KEY, name, raw)
+        else:
+            pipe.hsetnx(SCHEDULE_KEY, name, raw)
+    written = sum(pipe.execute())
+    if overwrite:
+        stale = set(client.hkeys(SCHEDULE_KEY)) - set(settings.BEAT_SCHEDULE)
+        if stale:
+            client.hdel(SCHEDULE_KEY, *stale)
+        written = len(settings.BEAT_SCHEDULE)
+    if written:
+        client.incr(VERSION_KEY)
+    return written
+
+
+def load_schedule():
+    """Расписание из Redis: имя -> запись"""
+    return {
+        name: json.loads(raw) for name, raw in get_redis().hgetall(SCHEDULE_KEY).items()
+    }
+
+
+def save_entry(name, spec):
+    """Добавляет или заменяет запись; реплики подхватят её на следующем такте"""
+    entry = normalize_entry(spec)
+    client = get_redis()
+    client.hset(SCHEDULE_KEY, name, json.dumps(entry, ensure_ascii=False))
+    client.incr(VERSION_KEY)
+    return entry
+
+
+def remove_entry(name):
+    client = get_redis()
+    removed = client.hdel(SCHEDULE_KEY, name)
+    client.hdel(LAST_RUN_KEY, name)
+    if removed:
+        client.incr(VERSION_KEY)
+    return bool(removed)
+
+
+def current_leader():
+    return get_redis().get(LOCK_KEY)
+
+
+class LeaderScheduler(Scheduler):
+    """Scheduler, который отправляет задачи только при удержании блокировки лидера"""
+
+    def __init__(self, *args, **kwargs):
+        self.node = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lock_ttl = settings.BEAT_LOCK_TTL
+        self.is_leader = False
+        self._version = STALE
+        super().__init__(*args, **kwargs)
+        # Блокировка продлевается несколько раз за TTL
+        self.max_interval = min(self.max_interval, self.lock_ttl / 3)
+
+    def setup_schedule(self):
+        try:
+            seed_schedule()
+        except RedisError:
+            logger.exception("beat: не удалось записать расписание в Redis")
+        self.data = {}
+
+    def acquire(self):
+        """Захват или продление блокировки; при недоступном Redis — не лидер"""
+        try:
+            acquired = bool(
+                get_redis().eval(
+                    ACQUIRE_SCRIPT, 1, LOCK_KEY, self.node, int(self.lock_ttl * 1000)
+                )
+            )
+        except RedisError:
+            logger.exception("beat: Redis недоступен, отправка задач приостановлена")
+            acquired = False
+        if acquired != self.is_leader:
+            logger.warning(
+                "beat: %s лидерство",
+                "получено" if acquired else "потеряно",
+                extra={"node": self.node},
+            )
+            # Новый лидер перечитывает расписание и время запусков из Redis
+            self._version = STALE
+        self.is_leader = acquired
+        return acquired
+
+    def refresh(self):
+        """Перечитывает расписание, если его версия в Redis изменилась"""
+        client = get_redis()
+        version = client.get(VERSION_KEY)
+        if version == self._version:
+            return
+        last_run = client.hgetall(LAST_RUN_KEY)
+        entries = {}
+        for name, spec in load_schedule().items():
+            if not spec.get("enabled", True):
+                continue
+            try:
+                if name in last_run:
+                    last_run_at = datetime.fromtimestamp(
+                        float(last_run[name]), tz=timezone.utc
+                    )
+                else:
+                    # Ещё не запускалась: отсчёт не сбрасывается при перечитывании
+                    previous = self.data.get(name)
+                    last_run_at = previous.last_run_at if previous else None
+                entries[name] = self.Entry(
+                    name=name,
+                    task=spec["task"],
+                    schedule=parse_schedule(spec["schedule"]),
+                    args=spec.get("args", []),
+                    kwargs=spec.get("kwargs", {}),
+                    options=spec.get("options", {}),
+                    last_run_at=last_run_at,
+                    app=self.app,
+                )
+            except (KeyError, ValueError, TypeError, AttributeError):
+                logger.exception("beat: некорректная запись расписания %s", name)
+        self.data = entries
+        self._heap = None
+        self._version = version
+
+    def tick(self, *args, **kwargs):
+        if not self.acquire():
+            return self.max_interval
+        try:
+            self.refresh()
+        except RedisError:
+            logger.exception("beat: не удалось прочитать расписание")
+            return self.max_interval
+        try:
+            return min(super().tick(*args, **kwargs), self.max_interval)
+        except RedisError:
+            # Запись не сохранена и не отправлена: куча строится заново
+            logger.exception("beat: не удалось сохранить время запуска")
+            self._heap = None
+            return self.max_interval
+
+    def reserve(self, entry):
+        # Время запуска сохраняется до отправки: новый лидер не повторит задачу
+        new_entry = super().reserve(entry)
+        get_redis().hset(LAST_RUN_KEY, entry.name, new_entry.last_run_at.timestamp())
+        return new_entry
+
+    def close(self):
+        super().close()
+        if not self.is_leader:
+            return
+        # Корректная остановка отдаёт лидерство сразу, не дожидаясь TTL
+        try:
+            get_redis().eval(RELEASE_SCRIPT, 1, LOCK_KEY, self.node)
+        except RedisError:
+            logger.exception("beat: не удалось освободить блокировку")
+        self.is_leader = False
+
+    @property
+    def info(self):
+        return (
+            f"    . leader lock -> {LOCK_KEY} (ttl {self.lock_ttl}s, node {self.node})"
+        )
@@ -1,6 +1,7 @@
 import os
 
 from celery import Celery
+from celery.signals import worker_process_shutdown, worker_ready
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
@@ -12,3 +13,20 @@ app.autodiscover_tasks()
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     print(f"Request: {self.request!r}")
+
+
+@worker_ready.connect
+def start_metrics_exporter(**kwargs):
+    """Экспортер метрик Prometheus для процесса worker"""
+    from django.conf import settings
+
+    from .metrics import start_worker_exporter
+
+    start_worker_exporter(settings.CELERY_METRICS_PORT)
+
+
+@worker_process_shutdown.connect
+def cleanup_process_metrics(pid=None, **kwargs):
+    from .metrics import mark_process_dead
+
+    mark_process_dead(pid)
@@ -0,0 +1,109 @@
+"""Чтение с реплик БД для безопасных действий API.
+
+Реплика выбирается один раз на запрос (все запросы к БД внутри него идут на
+неё) и только для действий из read_replica_actions. После записи пользователь
+REPLICA_STICKY_SECONDS читает с primary, чтобы видеть свои изменения,
+несмотря на отставание реплики. Метка хранится в Redis по id пользователя:
+клиенты с JWT cookie не сохраняют.
+"""
+
+import logging
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from redis.exceptions import RedisError
+from rest_framework.permissions import SAFE_METHODS
+
+from .redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Реплика для текущего запроса; None — всё читается с primary
+_read_replica = ContextVar("read_replica", default=None)
+STICKY_KEY = "db:primary:{}"
+
+
+def current_replica():
+    return _read_replica.get()
+
+
+def stick_to_primary(user_id):
+    """Следующие REPLICA_STICKY_SECONDS пользователь читает с primary"""
+    try:
+        get_redis().set(
+            STICKY_KEY.format(user_id), 1, ex=settings.REPLICA_STICKY_SECONDS
+        )
+    except RedisError:
+        logger.warning(
+            "Не удалось сохранить привязку к primary", extra={"user_id": user_id}
+        )
+
+
+def is_sticky(user_id):
+    """Писал ли пользователь недавно; при сбое Redis — да (чтение с primary)"""
+    try:
+        return bool(get_redis().exists(STICKY_KEY.format(user_id)))
+    except RedisError:
+        return True
+
+
+class PrimaryReplicaRouter:
+    """Запись и миграции — только primary, чтение — выбранная для запроса реплика"""
+
+    def db_for_read(self, model, **hints):
+        return _read_replica.get()
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии primary: объекты с любой из них связаны
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
+
+
+class ReadReplicaMixin:
+    """Вьюха, которая читает с реплики в действиях из read_replica_actions.
+
+    Для вьюх без action (не ViewSet) действием считается HTTP-метод: "get".
+    """
+
+    read_replica_actions = ()
+
+    def dispatch(self, request, *args, **kwargs):
+        token = _read_replica.set(None)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            _read_replica.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        # Аутентификация и проверка прав читают пользователя с primary
+        super().initial(request, *args, **kwargs)
+        _read_replica.set(self.get_read_replica(request))
+
+    def get_read_replica(self, request):
+        replicas = settings.REPLICA_DATABASES
+        action = getattr(self, "action", None) or request.method.lower()
+        if (
+            not replicas
+            or request.method not in SAFE_METHODS
+            or action not in self.read_replica_actions
+        ):
+            return None
+        if request.user.is_authenticated and is_sticky(request.user.pk):
+            return None
+        return random.choice(replicas)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (
+            settings.REPLICA_DATABASES
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            stick_to_primary(request.user.pk)
+        return super().finalize_response(request, response, *args, **kwargs)
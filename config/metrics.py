@@ -0,0 +1,32 @@
+import os
+
+from django.http import HttpResponse
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, generate_latest,
+                               multiprocess, start_http_server)
+
+
+def get_registry():
+    """Реестр метрик с учётом многопроцессного режима (PROMETHEUS_MULTIPROC_DIR)"""
+    if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_view(request):
+    """Метрики Prometheus веб-процесса"""
+    return HttpResponse(
+        generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST
+    )
+
+
+def start_worker_exporter(port):
+    """HTTP-экспортер метрик для Celery worker"""
+    start_http_server(port, registry=get_registry())
+
+
+def mark_process_dead(pid):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
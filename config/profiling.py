@@ -0,0 +1,217 @@
+import cProfile
+import io
+import pstats
+import random
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from rest_framework import permissions, serializers, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+_current = ContextVar("profiling_request", default=None)
+_lock = threading.Lock()
+_endpoints = {}
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Эндпоинт выполнил больше запросов к БД, чем указано в PROFILING_QUERY_BUDGETS"""
+
+
+class RequestProfile:
+    __slots__ = ("queries", "db_time", "serializer_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+
+
+@contextmanager
+def track_serialization():
+    """Учитывает время сериализации в профиле текущего запроса"""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.serializer_time += time.perf_counter() - started
+
+
+def _install_serializer_hook():
+    """Оборачивает BaseSerializer.data замером времени (один раз на процесс)"""
+    data = serializers.BaseSerializer.data
+    if getattr(data.fget, "profiled", False):
+        return
+
+    def profiled_data(self):
+        with track_serialization():
+            return data.fget(self)
+
+    profiled_data.profiled = True
+    serializers.BaseSerializer.data = property(profiled_data)
+
+
+def _query_wrapper(execute, sql, params, many, context):
+    profile = _current.get()
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if profile is not None:
+            profile.queries += 1
+            profile.db_time += time.perf_counter() - started
+
+
+def endpoint_name(view_func, method):
+    """Имя эндпоинта вида HabitViewSet.list или UserRegistrationView"""
+    view_class = getattr(view_func, "cls", None)
+    if view_class is None:
+        return getattr(view_func, "__name__", "unknown")
+    actions = getattr(view_func, "actions", None)
+    if actions:
+        return f"{view_class.__name__}.{actions.get(method.lower(), method.lower())}"
+    return view_class.__name__
+
+
+def _run_profiler(get_response, request):
+    if settings.PROFILING_PROFILER == "pyinstrument":
+        from pyinstrument import Profiler
+
+        profiler = Profiler()
+        profiler.start()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.stop()
+        return response, profiler.output_text()
+
+    profiler = cProfile.Profile()
+    response = profiler.runcall(get_response, request)
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(30)
+    return response, output.getvalue()
+
+
+def _record(name, wall, profile, sample):
+    with _lock:
+        entry = _endpoints.setdefault(
+            name,
+            {
+                "requests": 0,
+                "wall_time": 0.0,
+                "max_wall_time": 0.0,
+                "queries": 0,
+                "max_queries": 0,
+                "db_time": 0.0,
+                "serializer_time": 0.0,
+                "last_profile": None,
+            },
+        )
+        entry["requests"] += 1
+        entry["wall_time"] += wall
+        entry["max_wall_time"] = max(entry["max_wall_time"], wall)
+        entry["queries"] += profile.queries
+        entry["max_queries"] = max(entry["max_queries"], profile.queries)
+        entry["db_time"] += profile.db_time
+        entry["serializer_time"] += profile.serializer_time
+        if sample is not None:
+            entry["last_profile"] = sample
+
+
+def profiling_report():
+    """Агрегированная статистика по эндпоинтам (средние значения в мс)"""
+    with _lock:
+        report = {}
+        for name, entry in _endpoints.items():
+            count = entry["requests"]
+            report[name] = {
+                "requests": count,
+                "avg_wall_ms": round(entry["wall_time"] / count * 1000, 3),
+                "max_wall_ms": round(entry["max_wall_time"] * 1000, 3),
+                "avg_queries": round(entry["queries"] / count, 2),
+                "max_queries": entry["max_queries"],
+                "avg_db_ms": round(entry["db_time"] / count * 1000, 3),
+                "avg_serializer_ms": round(entry["serializer_time"] / count * 1000, 3),
+                "query_budget": settings.PROFILING_QUERY_BUDGETS.get(name),
+                "last_profile": entry["last_profile"],
+            }
+        return report
+
+
+def reset_profiling():
+    with _lock:
+        _endpoints.clear()
+
+
+class ProfilingMiddleware:
+    """Замер времени, запросов к БД и сериализации по эндпоинтам DRF.
+
+    Включается добавлением в MIDDLEWARE (PROFILING_ENABLED=True). Доля запросов
+    PROFILING_SAMPLE_RATE дополнительно профилируется cProfile или pyinstrument.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        _install_serializer_hook()
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        token = _current.set(profile)
+        sample = None
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_query_wrapper))
+                if random.random() < settings.PROFILING_SAMPLE_RATE:
+                    response, sample = _run_profiler(self.get_response, request)
+                else:
+                    response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        wall = time.perf_counter() - started
+
+        name = getattr(request, "profiling_endpoint", None)
+        if name is None:
+            return response
+        _record(name, wall, profile, sample)
+        response["Server-Timing"] = (
+            f"total;dur={wall * 1000:.1f}, db;dur={profile.db_time * 1000:.1f}, "
+            f"serializer;dur={profile.serializer_time * 1000:.1f}"
+        )
+
+        budget = settings.PROFILING_QUERY_BUDGETS.get(name)
+        if (
+            settings.PROFILING_ENFORCE_BUDGETS
+            and budget is not None
+            and profile.queries > budget
+        ):
+            raise QueryBudgetExceeded(
+                f"{name}: {profile.queries} запросов к БД при бюджете {budget}"
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.profiling_endpoint = endpoint_name(view_func, request.method)
+
+
+class ProfilingReportView(APIView):
+    """Статистика профилирования эндпоинтов (только для администраторов)"""
+
+    permission_classes = [permissions.IsAdminUser]
+    schema = None
+
+    def get(self, request):
+        return Response(profiling_report())
+
+    def delete(self, request):
+        reset_profiling()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,17 @@
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+
+
+@lru_cache(maxsize=None)
+def get_redis(url=None):
+    """Общий клиент Redis на процесс (пул соединений внутри клиента)"""
+    # Короткие таймауты: при недоступном Redis откаты (лимиты, чёрный список
+    # токенов, привязка к primary) срабатывают сразу, а не через таймаут TCP
+    return redis.Redis.from_url(
+        url or settings.REDIS_URL,
+        decode_responses=True,
+        socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    )
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import logging
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from drf_spectacular.generators import SchemaGenerator
+from rest_framework import permissions
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.views import APIView
+
+try:
+    import orjson
+except ImportError:  # orjson необязателен
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_CONTENT_TYPE = "application/vnd.oai.openapi+json"
+
+_lock = threading.Lock()
+_cache = {}
+
+
+def schema_path():
+    """Файл схемы для текущей версии API"""
+    version = settings.SPECTACULAR_SETTINGS["VERSION"]
+    return Path(settings.OPENAPI_SCHEMA_DIR) / f"openapi-{version}.json"
+
+
+def generate_schema():
+    """Схема OpenAPI в JSON (интроспекция всех представлений)"""
+    schema = SchemaGenerator().get_schema(request=None, public=True)
+    if orjson is None:
+        return json.dumps(
+            schema, cls=JSONEncoder, ensure_ascii=False, indent=2, sort_keys=True
+        ).encode()
+    return orjson.dumps(schema, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS)
+
+
+def write_schema(path=None):
+    path = Path(path or schema_path())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(generate_schema())
+    return path
+
+
+def load_schema():
+    """Схема из файла сборки; без файла генерируется один раз на процесс"""
+    path = schema_path()
+    with _lock:
+        if path not in _cache:
+            if path.exists():
+                content = path.read_bytes()
+            else:
+                logger.warning(
+                    "Файл схемы не найден, схема сгенерирована в процессе",
+                    extra={"path": str(path)},
+                )
+                content = generate_schema()
+            etag = f'"{hashlib.md5(content).hexdigest()}"'
+            _cache[path] = (content, etag)
+        return _cache[path]
+
+
+def clear_schema_cache():
+    with _lock:
+        _cache.clear()
+
+
+class StaticSchemaView(APIView):
+    """Схема OpenAPI из заранее сгенерированного файла (generate_schema)"""
+
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+    schema = None
+
+    def get(self, request):
+        content, etag = load_schema()
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(content, content_type=SCHEMA_CONTENT_TYPE)
+        response["ETag"] = etag
+        patch_cache_control(
+            response, public=True, max_age=settings.OPENAPI_SCHEMA_MAX_AGE
+        )
+        return response
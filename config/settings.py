@@ -3,6 +3,7 @@ from datetime import timedelta
 from pathlib import Path
 
 from dotenv import load_dotenv
+from kombu import Queue
 
 load_dotenv()
 
@@ -29,6 +30,7 @@ INSTALLED_APPS = [
     # Third party
     "rest_framework",
     "rest_framework_simplejwt",  # ДОБАВЛЕНО
+    "rest_framework_simplejwt.token_blacklist",
     "django_filters",
     "corsheaders",
     "drf_spectacular",
@@ -36,6 +38,7 @@ INSTALLED_APPS = [
     "users.apps.UsersConfig",
     "habits.apps.HabitsConfig",
     "bot.apps.BotConfig",
+    "benchmarks.apps.BenchmarksConfig",
 ]
 
 MIDDLEWARE = [
@@ -49,6 +52,34 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Профилирование запросов (opt-in): время, запросы к БД, сериализация
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "False").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_PROFILER = os.getenv("PROFILING_PROFILER", "cprofile")
+PROFILING_ENFORCE_BUDGETS = False
+# Бюджеты включают запрос пользователя при JWT-аутентификации
+PROFILING_QUERY_BUDGETS = {
+    "HabitViewSet.list": 4,
+    "HabitViewSet.retrieve": 2,
+    "HabitViewSet.public": 4,
+    "HabitViewSet.trending": 2,
+    "HabitViewSet.agenda": 2,
+    "HabitViewSet.stats": 3,
+    "UserRegistrationView": 3,
+    "UserProfileView": 1,
+}
+
+# Сжатие ответов в Django, когда перед приложением нет nginx (в docker сжимает nginx)
+if os.getenv("GZIP_RESPONSES", "False").lower() in ("true", "1", "yes"):
+    MIDDLEWARE.insert(0, "django.middleware.gzip.GZipMiddleware")
+
+if PROFILING_ENABLED:
+    MIDDLEWARE.insert(0, "config.profiling.ProfilingMiddleware")
+
 ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
@@ -77,17 +108,31 @@ DATABASES = {
     }
 }
 
+if os.getenv("DATABASE_HOST"):
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.postgresql_psycopg2",
+        "NAME": os.getenv("DATABASE_NAME", "habit_tracker"),
+        "USER": os.getenv("DATABASE_USER", "postgres"),
+        "PASSWORD": os.getenv("DATABASE_PASSWORD", "password"),
+        "HOST": os.getenv("DATABASE_HOST"),
+        "PORT": os.getenv("DATABASE_PORT", "5432"),
+    }
+
+# Реплики только для чтения (через запятую): replica_1, replica_2, ...
+# В тестах реплики — зеркала default, отдельные БД не создаются
+for number, host in enumerate(
+    filter(None, os.getenv("DATABASE_REPLICA_HOSTS", "").split(",")), start=1
+):
+    DATABASES[f"replica_{number}"] = {
+        **DATABASES["default"],
+        "HOST": host.strip(),
+        "TEST": {"MIRROR": "default"},
+    }
 
-# DATABASES = {
-#     "default": {
-#         "ENGINE": "django.db.backends.postgresql_psycopg2",
-#         "NAME": os.getenv("DATABASE_NAME", "habit_tracker"),
-#         "USER": os.getenv("DATABASE_USER", "postgres"),
-#         "PASSWORD": os.getenv("DATABASE_PASSWORD", "password"),
-#         "HOST": os.getenv("DATABASE_HOST", "localhost"),
-#         "PORT": os.getenv("DATABASE_PORT", "5432"),
-#     }
-# }
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["config.db_router.PrimaryReplicaRouter"]
+# Сколько секунд после записи пользователь читает с primary (отставание реплики)
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "5"))
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -120,10 +165,30 @@ REST_FRAMEWORK = {
         "rest_framework.authentication.BasicAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
+    "DEFAULT_RENDERER_CLASSES": (
+        "config.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "config.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 5,
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
+    # Лимиты действуют на вьюхи с throttle_scope; окно скользящее, счётчики в Redis
+    "DEFAULT_THROTTLE_CLASSES": ["config.throttling.RedisScopedRateThrottle"],
+    "DEFAULT_THROTTLE_RATES": {
+        "register": os.getenv("THROTTLE_REGISTER_RATE", "5/hour"),
+        "login": os.getenv("THROTTLE_LOGIN_RATE", "10/min"),
+        "public": os.getenv("THROTTLE_PUBLIC_RATE", "60/min"),
+    },
+    # Число прокси перед приложением. По умолчанию 0: IP клиента — REMOTE_ADDR,
+    # иначе клиент в обход nginx подставил бы свой X-Forwarded-For и получал
+    # новый лимит на каждый адрес. За nginx (docker-compose) — 1
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", "0")),
 }
 
 # JWT Configuration - ДОБАВЛЕНО
@@ -132,6 +197,8 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
+    # Проверка чёрного списка при обновлении токена идёт через Redis
+    "TOKEN_REFRESH_SERIALIZER": "users.serializers.CachedTokenRefreshSerializer",
     "UPDATE_LAST_LOGIN": False,
     "ALGORITHM": "HS256",
     "SIGNING_KEY": SECRET_KEY,
@@ -165,8 +232,149 @@ CORS_ALLOW_ALL_ORIGINS = DEBUG
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/0")
 CELERY_TIMEZONE = TIME_ZONE
+# Результаты хранятся только у задач без ignore_result и удаляются через час
+CELERY_RESULT_EXPIRES = int(os.getenv("CELERY_RESULT_EXPIRES", "3600"))
+# Сериализация задач: json или msgpack (компактнее, нужен пакет msgpack).
+# json принимается всегда, чтобы не терять сообщения при смене сериализатора
+CELERY_TASK_SERIALIZER = os.getenv("CELERY_TASK_SERIALIZER", "json")
+CELERY_RESULT_SERIALIZER = CELERY_TASK_SERIALIZER
+CELERY_ACCEPT_CONTENT = sorted({"json", CELERY_TASK_SERIALIZER})
+
+# Очереди: напоминания не ждут за пакетными задачами (статистика, рейтинг).
+# Worker без -Q слушает все очереди; в docker-compose у каждой группы свой worker
+CELERY_TASK_DEFAULT_QUEUE = "default"
+CELERY_TASK_QUEUES = tuple(
+    Queue(name, routing_key=name)
+    for name in ("default", "reminders", "bulk", "maintenance")
+)
+CELERY_TASK_ROUTES = {
+    # В Redis меньшее значение приоритета забирается раньше: тик рассылки
+    # обгоняет накопившиеся повторы отправки
+    "habits.tasks.send_telegram_reminder": {"queue": "reminders", "priority": 0},
+    "habits.tasks.deliver_reminder": {"queue": "reminders", "priority": 3},
+    "habits.tasks.recalculate_habit_stats": {"queue": "bulk"},
+    "habits.tasks.aggregate_trending_habits": {"queue": "bulk"},
+    "habits.tasks.refresh_habit_dispatch_index": {"queue": "maintenance"},
+    "users.tasks.prune_expired_tokens": {"queue": "maintenance"},
+    "users.tasks.warm_token_blacklist": {"queue": "maintenance"},
+    "users.tasks.delete_account": {"queue": "bulk"},
+}
+CELERY_TASK_DEFAULT_PRIORITY = 5
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    "priority_steps": list(range(10)),
+    "sep": ":",
+    "queue_order_strategy": "priority",
+}
+# Beat с выбором лидера: реплик может быть несколько, задачи отправляет одна
+CELERY_BEAT_SCHEDULER = "config.beat:LeaderScheduler"
+# TTL блокировки лидера в секундах: за это время реплика перехватывает лидерство
+BEAT_LOCK_TTL = int(os.getenv("BEAT_LOCK_TTL", "15"))
+# Расписание по умолчанию: записывается в Redis при первом запуске beat и дальше
+# редактируется командой beat_schedule. schedule — cron «минута час день месяц
+# день_недели» или интервал в секундах
+BEAT_SCHEDULE = {
+    "send-habit-reminders": {
+        "task": "habits.tasks.send_telegram_reminder",
+        "schedule": "*/5 * * * *",
+    },
+    "recalculate-habit-stats": {
+        "task": "habits.tasks.recalculate_habit_stats",
+        "schedule": "0 3 * * *",
+    },
+    "refresh-habit-dispatch-index": {
+        "task": "habits.tasks.refresh_habit_dispatch_index",
+        "schedule": "30 */6 * * *",
+    },
+    # Инкрементально каждые 10 минут и полная перестройка в 04:05 — между
+    # инкрементальными прогонами (одновременный прогон всё равно пропускается)
+    "aggregate-trending-habits": {
+        "task": "habits.tasks.aggregate_trending_habits",
+        "schedule": "*/10 * * * *",
+    },
+    "rebuild-trending-habits": {
+        "task": "habits.tasks.aggregate_trending_habits",
+        "schedule": "5 4 * * *",
+        "kwargs": {"full": True},
+    },
+    "prune-expired-tokens": {
+        "task": "users.tasks.prune_expired_tokens",
+        "schedule": "45 4 * * *",
+    },
+    # Без метки полноты (Redis очищен, метка истекла) список отозванных токенов
+    # загружается заново; период совпадает с JWT_BLACKLIST_WARM_TTL
+    "warm-token-blacklist": {
+        "task": "users.tasks.warm_token_blacklist",
+        "schedule": "*/10 * * * *",
+    },
+}
+
+# Время жизни метки полноты чёрного списка в Redis (секунды): не дольше периода
+# warm-token-blacklist, чтобы пропущенная запись jti исправлялась сама
+JWT_BLACKLIST_WARM_TTL = 600
+
+# Worker берёт по одной задаче на процесс: короткие задачи не застревают
+# в буфере процесса, занятого долгой пакетной задачей
+CELERY_WORKER_PREFETCH_MULTIPLIER = int(
+    os.getenv("CELERY_WORKER_PREFETCH_MULTIPLIER", "1")
+)
+
+# Redis для данных приложения (рейтинги, токены); по умолчанию тот же, что у брокера
+REDIS_URL = os.getenv("REDIS_URL", CELERY_BROKER_URL)
+# Таймауты подключения и ответа Redis в секундах
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", "1"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "2"))
+
+# Рейтинг публичных привычек: окно «недавних» привычек в днях и их вес в оценке
+TRENDING_RECENT_DAYS = 7
+TRENDING_RECENT_WEIGHT = 5
+# Время жизни блокировки прогона рейтинга (секунды): больше самого долгого прогона
+TRENDING_LOCK_TTL = 1800
+
+# Длина окна рассылки напоминаний в минутах (совпадает с периодом задачи в beat)
+REMINDER_WINDOW_MINUTES = 5
+
+# Сводка: все привычки чата из одного окна рассылки отправляются одним сообщением
+REMINDER_DIGEST = os.getenv("REMINDER_DIGEST", "True").lower() in ("true", "1", "yes")
+
+# Повторы отправки напоминаний: число попыток и экспоненциальная задержка (секунды)
+REMINDER_MAX_ATTEMPTS = 5
+REMINDER_RETRY_BASE_SECONDS = 10
+REMINDER_RETRY_MAX_SECONDS = 900
 
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "your-telegram-bot-token")
+# Username бота для ссылки привязки https://t.me/<username>?start=<токен>
+TELEGRAM_BOT_USERNAME = os.getenv("TELEGRAM_BOT_USERNAME", "")
+# Время жизни одноразового токена привязки Telegram в секундах
+TELEGRAM_LINK_TTL = 600
+
+# Удаление аккаунта: привычек в одной пачке, время хранения хода удаления (секунды)
+# и число повторов задачи после сбоя (с экспоненциальной задержкой)
+ACCOUNT_DELETION_BATCH_SIZE = 500
+ACCOUNT_DELETION_STATUS_TTL = 86400
+ACCOUNT_DELETION_MAX_RETRIES = 5
+
+# Порт экспортера метрик Prometheus в Celery worker
+CELERY_METRICS_PORT = int(os.getenv("CELERY_METRICS_PORT", "9808"))
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text" if DEBUG else "json")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "json": {"()": "config.logging.JsonFormatter"},
+        "text": {"format": "%(asctime)s %(levelname)s %(name)s: %(message)s"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": LOG_FORMAT},
+    },
+    "loggers": {
+        "habits": {"handlers": ["console"], "level": LOG_LEVEL},
+        "bot": {"handlers": ["console"], "level": LOG_LEVEL},
+        "config": {"handlers": ["console"], "level": LOG_LEVEL},
+    },
+}
 
 SPECTACULAR_SETTINGS = {
     "TITLE": "Habit Tracker API",
@@ -175,6 +383,10 @@ SPECTACULAR_SETTINGS = {
     "SERVE_INCLUDE_SCHEMA": False,
 }
 
+# Схема OpenAPI генерируется при сборке (manage.py generate_schema); на лету — только в DEBUG
+OPENAPI_SCHEMA_DIR = BASE_DIR / "schema"
+OPENAPI_SCHEMA_MAX_AGE = 3600
+
 AUTH_USER_MODEL = "users.User"
 
 # Static files (CSS, JavaScript, Images)
@@ -183,4 +395,4 @@ STATIC_ROOT = '/app/static'
 
 # Media files
 MEDIA_URL = '/media/'
-MEDIA_ROOT = '/app/media'
\ No newline at end of file
+MEDIA_ROOT = '/app/media'
@@ -0,0 +1,8 @@
+"""Настройки процесса Telegram-бота (manage.py start_bot).
+
+Бот работает только с моделями, поэтому использует набор приложений worker.
+Запуск:
+    DJANGO_SETTINGS_MODULE=config.settings_bot python manage.py start_bot
+"""
+
+from .settings_worker import *  # noqa: F401,F403
@@ -0,0 +1,34 @@
+"""Настройки процессов Celery (worker и beat).
+
+Worker не обслуживает HTTP: админка, схема API, CORS и middleware ему не нужны,
+а их импорт удлиняет холодный старт. Запуск:
+    DJANGO_SETTINGS_MODULE=config.settings_worker celery -A config worker
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS
+
+# Приложения, которые нужны только веб-процессу
+WEB_ONLY_APPS = {
+    "django.contrib.admin",
+    "django.contrib.sessions",
+    "django.contrib.messages",
+    "django.contrib.staticfiles",
+    "rest_framework",
+    "rest_framework_simplejwt",
+    "django_filters",
+    "corsheaders",
+    "drf_spectacular",
+    "benchmarks.apps.BenchmarksConfig",
+}
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in WEB_ONLY_APPS]
+
+# Журнал админки ссылается на пользователей: модель остаётся, автопоиск admin.py — нет
+INSTALLED_APPS.insert(0, "django.contrib.admin.apps.SimpleAdminConfig")
+
+MIDDLEWARE = []
+ROOT_URLCONF = "config.urls_worker"
+
+# Проверки интерфейса админки (сессии, сообщения) к этим процессам не относятся
+SILENCED_SYSTEM_CHECKS = ["admin.E406", "admin.E408", "admin.E409", "admin.E410"]
@@ -1,10 +1,20 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
+from .metrics import metrics_view
+from .profiling import ProfilingReportView
+from .schema import StaticSchemaView
+
+# Живая генерация схемы на каждый запрос нужна только при разработке
+schema_view = (
+    SpectacularAPIView.as_view() if settings.DEBUG else StaticSchemaView.as_view()
+)
+
 urlpatterns = [
     path("admin/", admin.site.urls),
-    path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
+    path("api/schema/", schema_view, name="schema"),
     path(
         "api/docs/",
         SpectacularSwaggerView.as_view(url_name="schema"),
@@ -12,4 +22,6 @@ urlpatterns = [
     ),
     path("api/auth/", include("users.urls")),
     path("api/", include("habits.urls")),
+    path("metrics", metrics_view, name="metrics"),
+    path("api/profiling/", ProfilingReportView.as_view(), name="profiling"),
 ]
@@ -0,0 +1,2 @@
+# Worker и бот не обслуживают HTTP; Celery импортирует ROOT_URLCONF при старте
+urlpatterns = []
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Habit
+from .models import Habit, HabitCompletion, HabitStats
 
 
 @admin.register(Habit)
@@ -32,3 +32,24 @@ class HabitAdmin(admin.ModelAdmin):
         ),
         ("Даты", {"fields": ("created_at", "updated_at"), "classes": ("collapse",)}),
     )
+
+
+@admin.register(HabitCompletion)
+class HabitCompletionAdmin(admin.ModelAdmin):
+    list_display = ["habit", "date", "created_at"]
+    list_filter = ["date"]
+    search_fields = ["habit__action", "habit__user__email"]
+    readonly_fields = ["created_at"]
+
+
+@admin.register(HabitStats)
+class HabitStatsAdmin(admin.ModelAdmin):
+    list_display = [
+        "habit",
+        "current_streak",
+        "longest_streak",
+        "total_completions",
+        "last_completed",
+    ]
+    search_fields = ["habit__action", "habit__user__email"]
+    readonly_fields = ["updated_at"]
@@ -0,0 +1,47 @@
+from django.db import transaction
+
+from .dispatch import rebuild_slots
+from .models import Habit
+
+COPY_FIELDS = (
+    "place",
+    "time",
+    "action",
+    "is_pleasant",
+    "periodicity",
+    "reward",
+    "duration",
+)
+
+
+def _copy(habit, user):
+    return Habit(user=user, **{field: getattr(habit, field) for field in COPY_FIELDS})
+
+
+def adopt_habits(user, habits):
+    """Копирует привычки в аккаунт user вместе со связанными приятными привычками.
+
+    Связанная привычка копируется один раз, даже если на неё ссылаются несколько
+    привычек или она сама есть в списке. Приятные копии создаются первыми, чтобы
+    получить их id; ссылки на них проставляются в памяти. Возвращает копии:
+    сначала в порядке исходных привычек, затем скопированные связанные.
+    """
+    sources = {habit.pk: habit for habit in habits}
+    for habit in habits:
+        if habit.related_habit_id is not None:
+            sources.setdefault(habit.related_habit_id, habit.related_habit)
+
+    copies = {pk: _copy(habit, user) for pk, habit in sources.items()}
+    pleasant = [copies[pk] for pk, habit in sources.items() if habit.is_pleasant]
+    useful = [copies[pk] for pk, habit in sources.items() if not habit.is_pleasant]
+
+    with transaction.atomic():
+        Habit.objects.bulk_create(pleasant)
+        for pk, habit in sources.items():
+            if habit.related_habit_id is not None:
+                copies[pk].related_habit = copies[habit.related_habit_id]
+        Habit.objects.bulk_create(useful)
+        # bulk_create не вызывает post_save: слоты рассылки строятся здесь
+        rebuild_slots(list(copies.values()), replace=False)
+
+    return list(copies.values())
@@ -0,0 +1,49 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def _etag(*parts):
+    key = ":".join(str(part) for part in parts)
+    return quote_etag(hashlib.md5(key.encode()).hexdigest())
+
+
+def list_validators(request, queryset):
+    """ETag списка по агрегату max(updated_at) + count.
+
+    Last-Modified у списка нет: после удаления привычки max(updated_at) не
+    растёт, и If-Modified-Since вернул бы 304. Удаление меняет только count.
+    """
+    aggregate = queryset.aggregate(last=Max("updated_at"), count=Count("id"))
+    last_modified = aggregate["last"]
+    return _etag(
+        last_modified and last_modified.isoformat(),
+        aggregate["count"],
+        request.get_full_path(),
+        request.user.pk,
+        request.accepted_renderer.format,
+    )
+
+
+def object_validators(request, obj):
+    """ETag и Last-Modified привычки по updated_at"""
+    etag = _etag(obj.pk, obj.updated_at.isoformat(), request.accepted_renderer.format)
+    return etag, obj.updated_at
+
+
+def not_modified(request, etag, last_modified):
+    """Ответ 304, если клиент прислал актуальные If-None-Match/If-Modified-Since"""
+    return get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+
+
+def set_validators(response, etag, last_modified):
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    return response
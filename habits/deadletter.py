@@ -0,0 +1,57 @@
+import json
+
+from django.utils import timezone
+
+from config.redis import get_redis
+
+# Очередь недоставленных напоминаний (список JSON-записей, новые в конце)
+DLQ_KEY = "habits:reminders:dlq"
+
+
+def dead_letter(chat_id, text, habit_ids, error, attempts):
+    """Кладёт сообщение в очередь недоставленных"""
+    entry = {
+        "chat_id": chat_id,
+        "text": text,
+        "habit_ids": habit_ids,
+        "error": str(error),
+        "attempts": attempts,
+        "failed_at": timezone.now().isoformat(),
+    }
+    get_redis().rpush(DLQ_KEY, json.dumps(entry, ensure_ascii=False))
+
+
+def dead_letter_count():
+    return get_redis().llen(DLQ_KEY)
+
+
+def peek_dead_letters(start=0, count=20):
+    """Записи очереди без извлечения"""
+    end = start + count - 1
+    return [json.loads(raw) for raw in get_redis().lrange(DLQ_KEY, start, end)]
+
+
+def take_dead_letters(count):
+    """Атомарно извлекает до count записей из начала очереди"""
+    pipe = get_redis().pipeline(transaction=True)
+    pipe.lrange(DLQ_KEY, 0, count - 1)
+    pipe.ltrim(DLQ_KEY, count, -1)
+    raw, _ = pipe.execute()
+    return [json.loads(item) for item in raw]
+
+
+def restore_dead_letters(entries):
+    """Возвращает извлечённые, но не обработанные записи в начало очереди"""
+    if entries:
+        raw = [json.dumps(entry, ensure_ascii=False) for entry in entries]
+        # LPUSH кладёт элементы по одному в начало: обратный порядок сохраняет исходный
+        get_redis().lpush(DLQ_KEY, *reversed(raw))
+
+
+def purge_dead_letters():
+    """Очищает очередь и возвращает число удалённых записей"""
+    pipe = get_redis().pipeline(transaction=True)
+    pipe.llen(DLQ_KEY)
+    pipe.delete(DLQ_KEY)
+    count, _ = pipe.execute()
+    return count
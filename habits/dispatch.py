@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Habit, HabitDispatchSlot
+from .scheduling import due_mask
+
+BATCH_SIZE = 2000
+
+
+def dispatch_bucket(moment):
+    """Номер окна рассылки внутри недели (UTC) для момента времени"""
+    moment = moment.astimezone(dt_timezone.utc)
+    minute = moment.weekday() * 24 * 60 + moment.hour * 60 + moment.minute
+    return minute // settings.REMINDER_WINDOW_MINUTES
+
+
+def habit_slots(habit, zone, today):
+    """Слоты рассылки привычки на семь локальных дней начиная с today"""
+    slots = []
+    for offset in range(7):
+        day = today + timedelta(days=offset)
+        moment = datetime.combine(day, habit.time, tzinfo=zone).astimezone(
+            dt_timezone.utc
+        )
+        slots.append(
+            HabitDispatchSlot(
+                habit_id=habit.pk,
+                bucket=dispatch_bucket(moment),
+                day_shift=(day - moment.date()).days,
+            )
+        )
+    return slots
+
+
+def rebuild_slots(habits, now=None, replace=True):
+    """Пересчитывает слоты для списка привычек (с загруженными пользователями).
+
+    replace=False — для только что созданных привычек, у которых слотов ещё нет.
+    """
+    now = now or timezone.now()
+    zones = {}
+    slots = []
+    for habit in habits:
+        name = habit.user.timezone
+        if name not in zones:
+            zones[name] = ZoneInfo(name)
+        zone = zones[name]
+        slots.extend(habit_slots(habit, zone, now.astimezone(zone).date()))
+
+    with transaction.atomic():
+        if replace:
+            HabitDispatchSlot.objects.filter(habit__in=[h.pk for h in habits]).delete()
+        HabitDispatchSlot.objects.bulk_create(slots)
+    return len(habits)
+
+
+def rebuild_dispatch_index(queryset=None, batch_size=BATCH_SIZE):
+    """Перестраивает индекс рассылки пачками по batch_size привычек"""
+    queryset = Habit.objects.all() if queryset is None else queryset
+    queryset = (
+        queryset.select_related("user")
+        .only("id", "time", "user__timezone")
+        .order_by("pk")
+    )
+    now = timezone.now()
+    rebuilt = 0
+    batch = []
+    for habit in queryset.iterator(chunk_size=batch_size):
+        batch.append(habit)
+        if len(batch) >= batch_size:
+            rebuilt += rebuild_slots(batch, now)
+            batch = []
+    if batch:
+        rebuilt += rebuild_slots(batch, now)
+    return rebuilt
+
+
+def zones_with_transitions(names, now=None, days=7):
+    """Часовые пояса, у которых смещение от UTC меняется в пределах ±days дней"""
+    now = now or timezone.now()
+    window = timedelta(days=days)
+    changed = []
+    for name in names:
+        zone = ZoneInfo(name)
+        offsets = {
+            (now + delta).astimezone(zone).utcoffset()
+            for delta in (-window, timedelta(0), window)
+        }
+        if len(offsets) > 1:
+            changed.append(name)
+    return changed
+
+
+def refresh_dispatch_index(now=None):
+    """Перестраивает слоты пользователей, у которых рядом переход на летнее время"""
+    names = (
+        get_user_model()
+        .objects.filter(habits__isnull=False)
+        .values_list("timezone", flat=True)
+        .distinct()
+    )
+    changed = zones_with_transitions(names, now)
+    if not changed:
+        return 0
+    return rebuild_dispatch_index(Habit.objects.filter(user__timezone__in=changed))
+
+
+def due_habits(now):
+    """Привычки из текущего окна рассылки, которые нужно выполнить сегодня"""
+    slots = list(
+        HabitDispatchSlot.objects.filter(bucket=dispatch_bucket(now)).select_related(
+            "habit__user", "habit__related_habit"
+        )
+    )
+    if not slots:
+        return []
+
+    utc_date = now.astimezone(dt_timezone.utc).date()
+    mask = due_mask(
+        [
+            timezone.localdate(
+                slot.habit.created_at, ZoneInfo(slot.habit.user.timezone)
+            )
+            for slot in slots
+        ],
+        [slot.habit.periodicity for slot in slots],
+        [utc_date + timedelta(days=slot.day_shift) for slot in slots],
+    )
+    return [slot.habit for slot, due in zip(slots, mask) if due]
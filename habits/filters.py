@@ -0,0 +1,28 @@
+from rest_framework.filters import BaseFilterBackend
+
+from .search import search_habits
+
+
+class HabitSearchFilter(BaseFilterBackend):
+    """Полнотекстовый поиск ?search= по публичным привычкам"""
+
+    search_param = "search"
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, "").strip()
+        if not text or getattr(view, "action", None) != "public":
+            return queryset
+        return search_habits(queryset, text)
+
+    def get_schema_operation_parameters(self, view):
+        if getattr(view, "action", None) != "public":
+            return []
+        return [
+            {
+                "name": self.search_param,
+                "required": False,
+                "in": "query",
+                "description": "Поиск по действию, месту и вознаграждению",
+                "schema": {"type": "string"},
+            }
+        ]
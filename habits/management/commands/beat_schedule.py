@@ -0,0 +1,74 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from config.beat import (current_leader, load_schedule, remove_entry,
+                         save_entry, seed_schedule)
+
+
+class Command(BaseCommand):
+    help = "Просмотр и изменение расписания Celery beat в Redis без перезапуска"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "action",
+            nargs="?",
+            choices=["list", "set", "enable", "disable", "remove", "reset"],
+            default="list",
+        )
+        parser.add_argument("name", nargs="?", help="Имя записи расписания")
+        parser.add_argument("--task", help="Имя задачи Celery")
+        parser.add_argument(
+            "--schedule",
+            help="Cron «минута час день месяц день_недели» или интервал в секундах",
+        )
+        parser.add_argument("--kwargs", help="Аргументы задачи в JSON")
+
+    def handle(self, *args, **options):
+        action = options["action"]
+        if action == "list":
+            return self.list_schedule()
+        if action == "reset":
+            seed_schedule(overwrite=True)
+            self.stdout.write(self.style.SUCCESS("Расписание сброшено к настройкам"))
+            return
+
+        name = options["name"]
+        if not name:
+            raise CommandError("Укажите имя записи расписания")
+        if action == "remove":
+            if not remove_entry(name):
+                raise CommandError(f"Запись {name} не найдена")
+            self.stdout.write(self.style.SUCCESS(f"Запись {name} удалена"))
+            return
+
+        schedule = load_schedule()
+        spec = schedule.get(name, {})
+        if action in ("enable", "disable"):
+            if not spec:
+                raise CommandError(f"Запись {name} не найдена")
+            spec["enabled"] = action == "enable"
+        else:
+            if options["task"]:
+                spec["task"] = options["task"]
+            if options["schedule"]:
+                value = options["schedule"]
+                spec["schedule"] = int(value) if value.isdigit() else value
+            if options["kwargs"]:
+                spec["kwargs"] = json.loads(options["kwargs"])
+            if "task" not in spec or "schedule" not in spec:
+                raise CommandError("Для новой записи нужны --task и --schedule")
+        try:
+            save_entry(name, spec)
+        except ValueError as error:
+            raise CommandError(str(error)) from error
+        self.stdout.write(self.style.SUCCESS(f"Запись {name} сохранена"))
+
+    def list_schedule(self):
+        self.stdout.write(f"Лидер: {current_leader() or '—'}")
+        for name, spec in sorted(load_schedule().items()):
+            state = "" if spec.get("enabled", True) else " (отключена)"
+            kwargs = f" {json.dumps(spec['kwargs'])}" if spec.get("kwargs") else ""
+            self.stdout.write(
+                f"{name}: {spec['task']} [{spec['schedule']}]{kwargs}{state}"
+            )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from config.schema import schema_path, write_schema
+
+
+class Command(BaseCommand):
+    help = "Генерация схемы OpenAPI в файл schema/openapi-<версия>.json"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output", help="Путь к файлу (по умолчанию schema/openapi-<версия>.json)"
+        )
+
+    def handle(self, *args, **options):
+        path = write_schema(options["output"] or schema_path())
+        self.stdout.write(self.style.SUCCESS(f"Схема сохранена: {path}"))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from habits.dispatch import rebuild_dispatch_index
+
+
+class Command(BaseCommand):
+    help = "Полная перестройка индекса рассылки напоминаний"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_dispatch_index(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Перестроены слоты рассылки для {rebuilt} привычек")
+        )
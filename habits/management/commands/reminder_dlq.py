@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from habits.deadletter import (dead_letter_count, peek_dead_letters,
+                               purge_dead_letters)
+from habits.tasks import replay_dead_letters
+
+
+class Command(BaseCommand):
+    help = "Просмотр, повтор и очистка очереди недоставленных напоминаний"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "action", nargs="?", choices=["list", "replay", "purge"], default="list"
+        )
+        parser.add_argument("--limit", type=int, help="Сколько записей обработать")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--sync",
+            action="store_true",
+            help="Отправлять в текущем процессе, а не через задачи Celery",
+        )
+
+    def handle(self, *args, **options):
+        if options["action"] == "purge":
+            purged = purge_dead_letters()
+            self.stdout.write(self.style.SUCCESS(f"Удалено записей: {purged}"))
+            return
+
+        if options["action"] == "replay":
+            replayed = replay_dead_letters(
+                limit=options["limit"],
+                batch_size=options["batch_size"],
+                enqueue=not options["sync"],
+            )
+            self.stdout.write(self.style.SUCCESS(f"Повторено сообщений: {replayed}"))
+            return
+
+        self.stdout.write(f"В очереди: {dead_letter_count()}")
+        for entry in peek_dead_letters(count=options["limit"] or 20):
+            self.stdout.write(
+                f"{entry['failed_at']} chat={entry['chat_id']} "
+                f"habits={entry['habit_ids']} attempts={entry['attempts']} "
+                f"error={entry['error']}"
+            )
@@ -0,0 +1,34 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+REMINDER_QUERY_SECONDS = Histogram(
+    "habit_reminder_query_seconds",
+    "Время выборки привычек для рассылки",
+)
+REMINDER_RENDER_SECONDS = Histogram(
+    "habit_reminder_render_seconds",
+    "Время формирования текста напоминания",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1),
+)
+REMINDER_SEND_SECONDS = Histogram(
+    "habit_reminder_send_seconds",
+    "Время отправки сообщения в Telegram",
+    ["status_code"],
+)
+REMINDERS_TOTAL = Counter(
+    "habit_reminders_total",
+    "Результаты отправки напоминаний",
+    ["outcome"],
+)
+REMINDER_MESSAGES_TOTAL = Counter(
+    "habit_reminder_messages_total",
+    "Сообщения, отправленные в Telegram (сводка — одно сообщение на чат)",
+)
+REMINDER_RETRIES_TOTAL = Counter(
+    "habit_reminder_retries_total",
+    "Повторные попытки отправки напоминаний",
+)
+REMINDER_DUE_HABITS = Gauge(
+    "habit_reminder_due_habits",
+    "Размер выборки привычек в последнем окне рассылки",
+    multiprocess_mode="livemostrecent",
+)
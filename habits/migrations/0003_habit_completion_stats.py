@@ -0,0 +1,108 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("habits", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HabitStats",
+            fields=[
+                (
+                    "habit",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="habits.habit",
+                        verbose_name="Привычка",
+                    ),
+                ),
+                (
+                    "current_streak",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Текущая серия"
+                    ),
+                ),
+                (
+                    "longest_streak",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Самая длинная серия"
+                    ),
+                ),
+                (
+                    "total_completions",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Всего выполнений"
+                    ),
+                ),
+                (
+                    "last_completed",
+                    models.DateField(
+                        blank=True, null=True, verbose_name="Последнее выполнение"
+                    ),
+                ),
+                (
+                    "recent_mask",
+                    models.BigIntegerField(
+                        default=0, verbose_name="Выполнения за последние 30 дней"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Дата обновления"),
+                ),
+            ],
+            options={
+                "verbose_name": "Статистика привычки",
+                "verbose_name_plural": "Статистика привычек",
+            },
+        ),
+        migrations.CreateModel(
+            name="HabitCompletion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="Дата выполнения")),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Дата отметки"
+                    ),
+                ),
+                (
+                    "habit",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="completions",
+                        to="habits.habit",
+                        verbose_name="Привычка",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Выполнение привычки",
+                "verbose_name_plural": "Выполнения привычек",
+                "ordering": ["-date"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("habit", "date"), name="unique_habit_completion_date"
+                    )
+                ],
+            },
+        ),
+    ]
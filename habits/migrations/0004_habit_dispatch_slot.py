@@ -0,0 +1,53 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("habits", "0003_habit_completion_stats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HabitDispatchSlot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "bucket",
+                    models.PositiveSmallIntegerField(
+                        db_index=True, verbose_name="Окно рассылки (UTC)"
+                    ),
+                ),
+                (
+                    "day_shift",
+                    models.SmallIntegerField(
+                        default=0, verbose_name="Сдвиг локальной даты относительно UTC"
+                    ),
+                ),
+                (
+                    "habit",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="dispatch_slots",
+                        to="habits.habit",
+                        verbose_name="Привычка",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Слот рассылки",
+                "verbose_name_plural": "Слоты рассылки",
+            },
+        ),
+    ]
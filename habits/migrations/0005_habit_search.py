@@ -0,0 +1,95 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import Q
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE habits_habit_fts USING fts5(
+        action, place, reward,
+        content='habits_habit', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER habits_habit_fts_insert AFTER INSERT ON habits_habit BEGIN
+        INSERT INTO habits_habit_fts(rowid, action, place, reward)
+        VALUES (new.id, new.action, new.place, new.reward);
+    END
+    """,
+    """
+    CREATE TRIGGER habits_habit_fts_delete AFTER DELETE ON habits_habit BEGIN
+        INSERT INTO habits_habit_fts(habits_habit_fts, rowid, action, place, reward)
+        VALUES ('delete', old.id, old.action, old.place, old.reward);
+    END
+    """,
+    """
+    CREATE TRIGGER habits_habit_fts_update AFTER UPDATE OF action, place, reward
+    ON habits_habit BEGIN
+        INSERT INTO habits_habit_fts(habits_habit_fts, rowid, action, place, reward)
+        VALUES ('delete', old.id, old.action, old.place, old.reward);
+        INSERT INTO habits_habit_fts(rowid, action, place, reward)
+        VALUES (new.id, new.action, new.place, new.reward);
+    END
+    """,
+    "INSERT INTO habits_habit_fts(habits_habit_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS habits_habit_fts_update",
+    "DROP TRIGGER IF EXISTS habits_habit_fts_delete",
+    "DROP TRIGGER IF EXISTS habits_habit_fts_insert",
+    "DROP TABLE IF EXISTS habits_habit_fts",
+]
+
+# Частичный GIN-индекс только по публичным привычкам; выражение совпадает с
+# habits.search.search_vector. Строится CONCURRENTLY, без блокировки записи
+POSTGRES_INDEX = "habits_habit_search_gin"
+
+
+def sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return any(row[0] == "ENABLE_FTS5" for row in cursor.fetchall())
+
+
+def postgres_index():
+    return GinIndex(
+        SearchVector("action", "place", "reward", config="russian"),
+        condition=Q(is_public=True),
+        name=POSTGRES_INDEX,
+    )
+
+
+def forward(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        schema_editor.add_index(
+            apps.get_model("habits", "Habit"), postgres_index(), concurrently=True
+        )
+    elif connection.vendor == "sqlite" and sqlite_has_fts5(connection):
+        for statement in SQLITE_FORWARD:
+            schema_editor.execute(statement)
+    # Без FTS5 поиск работает через icontains
+
+
+def backward(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {POSTGRES_INDEX}")
+    elif connection.vendor == "sqlite":
+        for statement in SQLITE_BACKWARD:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("habits", "0004_habit_dispatch_slot"),
+    ]
+
+    operations = [
+        migrations.RunPython(forward, backward),
+    ]
@@ -92,3 +92,109 @@ class Habit(models.Model):
     def save(self, *args, **kwargs):
         self.full_clean()
         super().save(*args, **kwargs)
+
+
+class HabitCompletion(models.Model):
+    habit = models.ForeignKey(
+        Habit,
+        on_delete=models.CASCADE,
+        related_name="completions",
+        verbose_name="Привычка",
+    )
+    date = models.DateField(verbose_name="Дата выполнения")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата отметки")
+
+    class Meta:
+        verbose_name = "Выполнение привычки"
+        verbose_name_plural = "Выполнения привычек"
+        ordering = ["-date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["habit", "date"], name="unique_habit_completion_date"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.habit.action} — {self.date}"
+
+
+class HabitStats(models.Model):
+    # Бит i в recent_mask означает выполнение за (last_completed - i) дней
+    RECENT_DAYS = 30
+
+    habit = models.OneToOneField(
+        Habit,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+        verbose_name="Привычка",
+    )
+    current_streak = models.PositiveIntegerField(
+        default=0, verbose_name="Текущая серия"
+    )
+    longest_streak = models.PositiveIntegerField(
+        default=0, verbose_name="Самая длинная серия"
+    )
+    total_completions = models.PositiveIntegerField(
+        default=0, verbose_name="Всего выполнений"
+    )
+    last_completed = models.DateField(
+        null=True, blank=True, verbose_name="Последнее выполнение"
+    )
+    recent_mask = models.BigIntegerField(
+        default=0, verbose_name="Выполнения за последние 30 дней"
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата обновления")
+
+    class Meta:
+        verbose_name = "Статистика привычки"
+        verbose_name_plural = "Статистика привычек"
+
+    def __str__(self):
+        return f"Статистика: {self.habit.action}"
+
+    def streak_on(self, day):
+        """Текущая серия с учётом пропусков до указанной даты"""
+        if self.last_completed is None:
+            return 0
+        if (day - self.last_completed).days > self.habit.periodicity:
+            return 0
+        return self.current_streak
+
+    def completion_rate(self, day, window):
+        """Доля выполненных повторений за последние window дней"""
+        if self.last_completed is None:
+            return 0.0
+        shift = (day - self.last_completed).days
+        if shift >= window:
+            return 0.0
+        if shift < 0:
+            mask, shift = self.recent_mask >> -shift, 0
+        else:
+            mask = self.recent_mask
+        completed = bin(mask & ((1 << (window - shift)) - 1)).count("1")
+        expected = -(-window // self.habit.periodicity)
+        return round(min(1.0, completed / expected), 3)
+
+
+class HabitDispatchSlot(models.Model):
+    # Корзина — номер окна рассылки внутри недели по UTC
+    habit = models.ForeignKey(
+        Habit,
+        on_delete=models.CASCADE,
+        related_name="dispatch_slots",
+        verbose_name="Привычка",
+    )
+    bucket = models.PositiveSmallIntegerField(
+        db_index=True, verbose_name="Окно рассылки (UTC)"
+    )
+    day_shift = models.SmallIntegerField(
+        default=0, verbose_name="Сдвиг локальной даты относительно UTC"
+    )
+
+    class Meta:
+        verbose_name = "Слот рассылки"
+        verbose_name_plural = "Слоты рассылки"
+
+    def __str__(self):
+        return f"{self.habit_id}: {self.bucket}"
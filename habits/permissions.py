@@ -5,4 +5,5 @@ class IsOwner(permissions.BasePermission):
     """Разрешение на доступ только к своим привычкам"""
 
     def has_object_permission(self, request, view, obj):
-        return obj.user == request.user
+        # Сравниваем по id, чтобы не загружать пользователя привычки из БД
+        return obj.user_id == request.user.pk
@@ -0,0 +1,66 @@
+# Ограничение Telegram на длину текста одного сообщения
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+DIGEST_HEADER = "Напоминания о привычках:"
+DIGEST_CONTINUATION = "Напоминания о привычках (продолжение):"
+
+
+def reminder_details(habit):
+    """Описание привычки в напоминании (без заголовка)"""
+    details = (
+        f"Я буду {habit.action} в {habit.time.strftime('%H:%M')} в {habit.place}.\n"
+        f"Время на выполнение: {habit.duration} секунд.\n"
+        f"Периодичность: каждые {habit.periodicity} дней."
+    )
+
+    if habit.reward:
+        details += f"\nВознаграждение: {habit.reward}"
+    elif habit.related_habit:
+        details += f"\nСвязанная привычка: {habit.related_habit.action}"
+    return details
+
+
+def render_reminder(habit):
+    """Текст напоминания о привычке"""
+    return f"Напоминание о привычке!\n\n{reminder_details(habit)}"
+
+
+def render_digest(habits, limit=TELEGRAM_MESSAGE_LIMIT):
+    """Сводка по нескольким привычкам одного чата.
+
+    Возвращает список пар (текст, привычки в нём); каждое сообщение не длиннее
+    limit; без привычек — пустой список. Привычка не разрывается между сообщениями, а слишком длинное
+    описание обрезается.
+    """
+    if not habits:
+        return []
+    if len(habits) == 1:
+        return [(render_reminder(habits[0]), list(habits))]
+
+    # Место под самый длинный заголовок и разделитель после него
+    room = limit - len(DIGEST_CONTINUATION) - 2
+    messages = []
+    parts, batch, size = [], [], 0
+    for habit in sorted(habits, key=lambda habit: habit.time):
+        part = reminder_details(habit)
+        if len(part) > room:
+            end = room - 1
+            part = part[:end] + "…"
+        added = len(part) + (2 if parts else 0)
+        if parts and size + added > room:
+            messages.append((parts, batch))
+            parts, batch, size = [], [], 0
+            added = len(part)
+        parts.append(part)
+        batch.append(habit)
+        size += added
+    messages.append((parts, batch))
+
+    return [
+        (
+            f"{DIGEST_HEADER if index == 0 else DIGEST_CONTINUATION}\n\n"
+            + "\n\n".join(parts),
+            batch,
+        )
+        for index, (parts, batch) in enumerate(messages)
+    ]
@@ -0,0 +1,66 @@
+import numpy as np
+from django.db.models.functions import TruncDate
+
+
+def _days(values):
+    """Переводит даты в номера дней от эпохи (int64)"""
+    return np.asarray(values, dtype="datetime64[D]").astype(np.int64)
+
+
+def due_mask(anchors, periodicities, day):
+    """Маска привычек, которые нужно выполнить в указанный день.
+
+    Привычка выполняется в день начала (anchor) и далее каждые periodicity дней.
+    day — одна дата или массив дат по одной на привычку.
+    """
+    delta = _days(day) - _days(anchors)
+    return (delta >= 0) & (delta % np.asarray(periodicities, dtype=np.int64) == 0)
+
+
+def expand_occurrences(anchors, periodicities, start, end):
+    """Разворачивает расписание пачки привычек на диапазон дат [start, end].
+
+    Возвращает пару массивов: индексы привычек во входных массивах и даты
+    выполнения (datetime64[D]). Строки упорядочены по привычке, затем по дате.
+    """
+    anchors = _days(anchors)
+    periodicities = np.asarray(periodicities, dtype=np.int64)
+    start, end = int(_days(start)), int(_days(end))
+    span = end - start + 1
+
+    delta = start - anchors
+    first = np.where(delta < 0, -delta, -delta % periodicities)
+    counts = np.where(first < span, (span - 1 - first) // periodicities + 1, 0)
+
+    indices = np.repeat(np.arange(len(anchors), dtype=np.int32), counts)
+    group_starts = np.repeat(np.cumsum(counts) - counts, counts)
+    steps = np.arange(len(indices), dtype=np.int64) - group_starts
+    days = start + first[indices] + steps * periodicities[indices]
+    return indices, days.astype("datetime64[D]")
+
+
+def build_agenda(queryset, start, end):
+    """Расписание привычек из queryset на диапазон дат, по дням и времени"""
+    rows = list(
+        queryset.annotate(anchor=TruncDate("created_at")).values_list(
+            "id", "anchor", "periodicity", "time", "action", "place"
+        )
+    )
+    if not rows:
+        return []
+    ids, anchors, periodicities, times, actions, places = zip(*rows)
+
+    indices, days = expand_occurrences(anchors, periodicities, start, end)
+    minutes = np.array([t.hour * 60 + t.minute for t in times], dtype=np.int32)
+    order = np.lexsort((minutes[indices], days))
+
+    return [
+        {
+            "date": day.item(),
+            "time": times[index],
+            "habit": ids[index],
+            "action": actions[index],
+            "place": places[index],
+        }
+        for index, day in zip(indices[order].tolist(), days[order])
+    ]
@@ -0,0 +1,68 @@
+import re
+
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = "habits_habit_fts"
+SEARCH_CONFIG = "russian"
+SEARCH_FIELDS = ("action", "place", "reward")
+
+_fts_tables = {}
+
+
+def search_vector():
+    # Должно совпадать с GIN-индексом из миграции 0005, иначе Postgres его не использует
+    return SearchVector(*SEARCH_FIELDS, config=SEARCH_CONFIG)
+
+
+def fts_available(conn):
+    """Есть ли в SQLite таблица FTS5 (создаётся миграцией, если FTS5 собран)"""
+    if conn.alias not in _fts_tables:
+        _fts_tables[conn.alias] = FTS_TABLE in conn.introspection.table_names()
+    return _fts_tables[conn.alias]
+
+
+def fts5_query(text):
+    """Запрос FTS5: все слова обязательны, каждое ищется по префиксу"""
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text))
+
+
+def search_habits(queryset, text):
+    """Полнотекстовый поиск по действию, месту и вознаграждению с ранжированием"""
+    # База запроса, а не default: список может читаться с реплики
+    conn = connections[queryset.db]
+    if conn.vendor == "postgresql":
+        vector = search_vector()
+        query = SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+        return (
+            queryset.annotate(search=vector, search_rank=SearchRank(vector, query))
+            .filter(search=query)
+            .order_by("-search_rank", "-pk")
+        )
+
+    if conn.vendor == "sqlite" and fts_available(conn):
+        query = fts5_query(text)
+        if not query:
+            return queryset.none()
+        # bm25 отрицательный: чем меньше, тем релевантнее
+        return (
+            queryset.extra(
+                tables=[FTS_TABLE],
+                where=[f"{FTS_TABLE}.rowid = habits_habit.id", f"{FTS_TABLE} MATCH %s"],
+                params=[query],
+            )
+            .annotate(search_rank=RawSQL(f"bm25({FTS_TABLE})", ()))
+            .order_by("search_rank", "-pk")
+        )
+
+    condition = Q()
+    for word in text.split():
+        condition &= (
+            Q(action__icontains=word)
+            | Q(place__icontains=word)
+            | Q(reward__icontains=word)
+        )
+    return queryset.filter(condition)
@@ -1,6 +1,28 @@
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework import serializers
 
-from .models import Habit
+from .models import Habit, HabitStats
+
+MAX_AGENDA_DAYS = 366
+MAX_ADOPT = 100
+
+# Колонки для быстрого чтения списков: порядок совпадает с полями HabitSerializer
+HABIT_READ_COLUMNS = (
+    "id",
+    "place",
+    "time",
+    "action",
+    "is_pleasant",
+    "related_habit",
+    "periodicity",
+    "reward",
+    "duration",
+    "is_public",
+    "created_at",
+    "updated_at",
+)
 
 
 class HabitSerializer(serializers.ModelSerializer):
@@ -64,3 +86,124 @@ class HabitSerializer(serializers.ModelSerializer):
                 )
 
         return data
+
+
+class HabitRowsSerializer(serializers.BaseSerializer):
+    """Быстрая сериализация строк values_list(*HABIT_READ_COLUMNS).
+
+    Возвращает ту же структуру, что HabitSerializer(many=True).data, но без
+    создания экземпляров модели и полей DRF. Весь список обрабатывается одним
+    вызовом to_representation, только для чтения.
+    """
+
+    def to_representation(self, rows):
+        tz = timezone.get_current_timezone()
+
+        def iso_datetime(value):
+            value = value.astimezone(tz).isoformat()
+            return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+        return [
+            {
+                "id": pk,
+                "place": place,
+                "time": time.isoformat(),
+                "action": action,
+                "is_pleasant": is_pleasant,
+                "related_habit": related_habit,
+                "periodicity": periodicity,
+                "reward": reward,
+                "duration": duration,
+                "is_public": is_public,
+                "created_at": iso_datetime(created_at),
+                "updated_at": iso_datetime(updated_at),
+            }
+            for (
+                pk,
+                place,
+                time,
+                action,
+                is_pleasant,
+                related_habit,
+                periodicity,
+                reward,
+                duration,
+                is_public,
+                created_at,
+                updated_at,
+            ) in rows
+        ]
+
+
+def serialize_habit_rows(rows):
+    return HabitRowsSerializer(rows).data
+
+
+class HabitCompletionSerializer(serializers.Serializer):
+    date = serializers.DateField(required=False)
+
+    def validate_date(self, value):
+        if value > timezone.localdate():
+            raise serializers.ValidationError("Нельзя отметить выполнение в будущем.")
+        return value
+
+
+class HabitStatsSerializer(serializers.ModelSerializer):
+    current_streak = serializers.SerializerMethodField()
+    completion_rate_7d = serializers.SerializerMethodField()
+    completion_rate_30d = serializers.SerializerMethodField()
+
+    class Meta:
+        model = HabitStats
+        fields = [
+            "current_streak",
+            "longest_streak",
+            "total_completions",
+            "last_completed",
+            "completion_rate_7d",
+            "completion_rate_30d",
+        ]
+
+    def get_current_streak(self, obj):
+        return obj.streak_on(timezone.localdate())
+
+    def get_completion_rate_7d(self, obj):
+        return obj.completion_rate(timezone.localdate(), 7)
+
+    def get_completion_rate_30d(self, obj):
+        return obj.completion_rate(timezone.localdate(), 30)
+
+
+class AgendaQuerySerializer(serializers.Serializer):
+    to = serializers.DateField(required=False)
+
+    def get_fields(self):
+        # "from" — зарезервированное слово, поэтому поле добавляется здесь
+        fields = super().get_fields()
+        fields["from"] = serializers.DateField(required=False)
+        return fields
+
+    def validate(self, data):
+        start = data.get("from", timezone.localdate())
+        end = data.get("to", start + timedelta(days=6))
+        if end < start:
+            raise serializers.ValidationError(
+                {"to": "Дата окончания раньше даты начала."}
+            )
+        if (end - start).days >= MAX_AGENDA_DAYS:
+            raise serializers.ValidationError(
+                {"to": f"Диапазон не может превышать {MAX_AGENDA_DAYS} дней."}
+            )
+        return {"from": start, "to": end}
+
+
+class TrendingQuerySerializer(serializers.Serializer):
+    page = serializers.IntegerField(min_value=1, default=1)
+
+
+class HabitAdoptSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_ADOPT,
+    )
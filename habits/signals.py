@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .dispatch import rebuild_dispatch_index, rebuild_slots
+from .models import Habit
+
+
+@receiver(post_save, sender=Habit)
+def update_habit_dispatch_slots(sender, instance, **kwargs):
+    """Пересчёт слотов рассылки при изменении привычки"""
+    rebuild_slots([instance])
+
+
+@receiver(pre_delete, sender=Habit)
+def touch_related_habits(sender, instance, **kwargs):
+    """Обновляет updated_at привычек, ссылающихся на удаляемую.
+
+    Каскад SET_NULL обнуляет related_habit через update() без auto_now, и
+    ETag списков (по max(updated_at)) не менялся бы.
+    """
+    Habit.objects.filter(related_habit=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def update_user_dispatch_slots(sender, instance, created, update_fields=None, **kwargs):
+    """Пересчёт слотов рассылки при смене часового пояса пользователя"""
+    previous = getattr(instance, "_saved_timezone", None)
+    instance._saved_timezone = instance.timezone
+    if created or (update_fields is not None and "timezone" not in update_fields):
+        return
+    if previous == instance.timezone:
+        return
+    rebuild_dispatch_index(Habit.objects.filter(user=instance))
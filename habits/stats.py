@@ -0,0 +1,151 @@
+from datetime import date
+
+import numpy as np
+from django.db import transaction
+
+from .models import Habit, HabitCompletion, HabitStats
+
+RECENT_MASK = (1 << HabitStats.RECENT_DAYS) - 1
+BATCH_SIZE = 10000
+
+
+def _apply_completion(stats, day, periodicity):
+    """Сдвигает агрегаты на одно новое выполнение (day > last_completed)"""
+    if stats.last_completed is None:
+        stats.current_streak = 1
+        stats.recent_mask = 1
+    else:
+        gap = (day - stats.last_completed).days
+        if gap > periodicity:
+            stats.current_streak = 1
+        else:
+            stats.current_streak += 1
+        stats.recent_mask = ((stats.recent_mask << min(gap, 63)) | 1) & RECENT_MASK
+    stats.longest_streak = max(stats.longest_streak, stats.current_streak)
+    stats.total_completions += 1
+    stats.last_completed = day
+
+
+def register_completion(habit, day):
+    """Сохраняет выполнение привычки и инкрементально обновляет её статистику.
+
+    Возвращает пару (статистика, создано ли новое выполнение).
+    """
+    with transaction.atomic():
+        _, created = HabitCompletion.objects.get_or_create(habit=habit, date=day)
+        stats, _ = HabitStats.objects.select_for_update().get_or_create(habit=habit)
+        stats.habit = habit
+        if not created and stats.last_completed is not None:
+            return stats, False
+
+        if not created or (
+            stats.last_completed is not None and day <= stats.last_completed
+        ):
+            # Отметка задним числом или потерянная статистика: пересчитываем привычку
+            recalculate_stats(Habit.objects.filter(pk=habit.pk))
+            stats.refresh_from_db()
+            stats.habit = habit
+        else:
+            _apply_completion(stats, day, habit.periodicity)
+            stats.save()
+    return stats, True
+
+
+def compute_stats(habit_ids, days, periodicities):
+    """Векторный расчёт агрегатов по выполнениям.
+
+    Все массивы — по одной строке на выполнение, отсортированы по (habit_id, day);
+    days — порядковые номера дат. Возвращает словарь массивов по одной строке
+    на привычку.
+    """
+    habit_ids = np.asarray(habit_ids, dtype=np.int64)
+    days = np.asarray(days, dtype=np.int64)
+    periodicities = np.asarray(periodicities, dtype=np.int64)
+    count = len(habit_ids)
+
+    new_habit = np.ones(count, dtype=bool)
+    new_habit[1:] = habit_ids[1:] != habit_ids[:-1]
+    gaps = np.zeros(count, dtype=np.int64)
+    gaps[1:] = days[1:] - days[:-1]
+
+    run_break = new_habit | (gaps > periodicities)
+    run_starts = np.flatnonzero(run_break)
+    run_ids = np.cumsum(run_break) - 1
+    run_lengths = np.arange(count) - run_starts[run_ids] + 1
+
+    starts = np.flatnonzero(new_habit)
+    ends = np.append(starts[1:], count) - 1
+    last = days[ends]
+
+    offsets = np.repeat(last, np.diff(np.append(starts, count))) - days
+    bits = np.where(
+        offsets < HabitStats.RECENT_DAYS,
+        np.left_shift(1, np.minimum(offsets, HabitStats.RECENT_DAYS)),
+        0,
+    )
+
+    return {
+        "habit_id": habit_ids[starts],
+        "current_streak": run_lengths[ends],
+        "longest_streak": np.maximum.reduceat(run_lengths, starts),
+        "total_completions": np.diff(np.append(starts, count)),
+        "last_completed": last,
+        "recent_mask": np.bitwise_or.reduceat(bits, starts),
+    }
+
+
+def _save_stats(result):
+    HabitStats.objects.bulk_create(
+        [
+            HabitStats(
+                habit_id=int(habit_id),
+                current_streak=int(current),
+                longest_streak=int(longest),
+                total_completions=int(total),
+                last_completed=date.fromordinal(int(last)),
+                recent_mask=int(mask),
+            )
+            for habit_id, current, longest, total, last, mask in zip(
+                result["habit_id"],
+                result["current_streak"],
+                result["longest_streak"],
+                result["total_completions"],
+                result["last_completed"],
+                result["recent_mask"],
+            )
+        ],
+        update_conflicts=True,
+        unique_fields=["habit"],
+        update_fields=[
+            "current_streak",
+            "longest_streak",
+            "total_completions",
+            "last_completed",
+            "recent_mask",
+            "updated_at",
+        ],
+    )
+
+
+def recalculate_stats(habits=None, batch_size=BATCH_SIZE):
+    """Полный пересчёт статистики пачками по batch_size привычек"""
+    habits = Habit.objects.all() if habits is None else habits
+    habit_ids = list(habits.order_by("pk").values_list("pk", flat=True))
+    updated = 0
+
+    for start in range(0, len(habit_ids), batch_size):
+        end = start + batch_size
+        batch = habit_ids[start:end]
+        rows = list(
+            HabitCompletion.objects.filter(habit_id__in=batch)
+            .order_by("habit_id", "date")
+            .values_list("habit_id", "date", "habit__periodicity")
+        )
+        if not rows:
+            continue
+        ids, dates, periodicities = zip(*rows)
+        result = compute_stats(ids, [day.toordinal() for day in dates], periodicities)
+        _save_stats(result)
+        updated += len(result["habit_id"])
+
+    return updated
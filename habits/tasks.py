@@ -1,55 +1,270 @@
-import requests
+import logging
+import random
+import time
+
 from celery import shared_task
 from django.conf import settings
 from django.utils import timezone
 
 from bot.models import TelegramUser
 
+from .deadletter import (dead_letter, dead_letter_count, restore_dead_letters,
+                         take_dead_letters)
+from .dispatch import due_habits, refresh_dispatch_index
+from .metrics import (REMINDER_DUE_HABITS, REMINDER_MESSAGES_TOTAL,
+                      REMINDER_QUERY_SECONDS, REMINDER_RENDER_SECONDS,
+                      REMINDER_RETRIES_TOTAL, REMINDER_SEND_SECONDS,
+                      REMINDERS_TOTAL)
 from .models import Habit
+from .reminders import render_digest, render_reminder
+from .stats import recalculate_stats
+from .trending import aggregate_trending
 
+logger = logging.getLogger(__name__)
+
+
+def reminder_messages(habits):
+    """Сообщения для одного чата: сводка или по сообщению на привычку"""
+    if settings.REMINDER_DIGEST:
+        return render_digest(habits)
+    return [(render_reminder(habit), [habit]) for habit in habits]
 
-@shared_task
-def send_telegram_reminder():
-    """Отправка напоминаний о привычках через Telegram"""
-    now = timezone.now()
-    current_time = now.time()
 
-    # Простая логика: проверяем привычки на текущее время ± 1 минута
-    habits_to_remind = Habit.objects.filter(
-        time__hour=current_time.hour, time__minute=current_time.minute
+class ReminderSendError(Exception):
+    """Сообщение не доставлено; retryable — есть смысл повторить позже"""
+
+    def __init__(self, message, retryable=True, retry_after=None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def retry_delay(attempt, retry_after=None):
+    """Экспоненциальная задержка с полным джиттером (не меньше retry_after Telegram)"""
+    cap = min(
+        settings.REMINDER_RETRY_MAX_SECONDS,
+        settings.REMINDER_RETRY_BASE_SECONDS * 2 ** (attempt - 1),
     )
+    return max(random.uniform(0, cap), retry_after or 0)
 
-    bot_token = settings.TELEGRAM_BOT_TOKEN
 
-    for habit in habits_to_remind:
+def post_reminder(chat_id, text):
+    """Один вызов sendMessage; ошибки приводятся к ReminderSendError"""
+    # requests импортируется при первой отправке, а не при старте worker
+    import requests
+
+    url = f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage"
+    started = time.perf_counter()
+    try:
+        response = requests.post(url, data={"chat_id": chat_id, "text": text})
+    except requests.RequestException as error:
+        REMINDER_SEND_SECONDS.labels(status_code="error").observe(
+            time.perf_counter() - started
+        )
+        raise ReminderSendError(str(error)) from error
+    elapsed = time.perf_counter() - started
+    REMINDER_SEND_SECONDS.labels(status_code=response.status_code).observe(elapsed)
+    REMINDER_MESSAGES_TOTAL.inc()
+
+    if response.status_code == 429:
         try:
-            telegram_user = TelegramUser.objects.get(user=habit.user)
+            retry_after = response.json()["parameters"]["retry_after"]
+        except (ValueError, KeyError, TypeError):
+            retry_after = None
+        raise ReminderSendError("Telegram: 429", retry_after=retry_after)
+    if response.status_code >= 500:
+        raise ReminderSendError(f"Telegram: {response.status_code}")
+    if response.status_code >= 400:
+        # Чат не найден, бот заблокирован: повтор не поможет
+        raise ReminderSendError(f"Telegram: {response.status_code}", retryable=False)
+    return elapsed
 
-            message = (
-                f"Напоминание о привычке!\n\n"
-                f"Я буду {habit.action} в {habit.time.strftime('%H:%M')} в {habit.place}.\n"
-                f"Время на выполнение: {habit.duration} секунд.\n"
-                f"Периодичность: каждые {habit.periodicity} дней."
-            )
 
-            if habit.reward:
-                message += f"\nВознаграждение: {habit.reward}"
-            elif habit.related_habit:
-                message += f"\nСвязанная привычка: {habit.related_habit.action}"
+def send_reminder_message(chat_id, text, habit_ids, attempt=1):
+    """Отправляет сообщение; при сбое планирует повтор или кладёт его в DLQ.
 
-            url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-            data = {"chat_id": telegram_user.chat_id, "text": message}
+    Повтор выполняется отдельной задачей с задержкой, поэтому сбой одного чата
+    не задерживает остальную рассылку.
+    """
+    extra = {"chat_id": chat_id, "habit_ids": habit_ids, "attempt": attempt}
+    try:
+        elapsed = post_reminder(chat_id, text)
+    except ReminderSendError as error:
+        extra["error"] = str(error)
+        failure = error
+        if error.retryable and attempt < settings.REMINDER_MAX_ATTEMPTS:
+            if schedule_retry(chat_id, habit_ids, attempt, error.retry_after):
+                logger.warning("Повтор отправки напоминания", extra=extra)
+                return False
+    except Exception as error:
+        logger.exception("Ошибка отправки напоминания", extra=extra)
+        failure = error
+    else:
+        REMINDERS_TOTAL.labels(outcome="sent").inc(len(habit_ids))
+        logger.info(
+            "Отправлено напоминание",
+            extra={**extra, "send_seconds": round(elapsed, 4)},
+        )
+        return True
 
-            response = requests.post(url, data=data)
-            response.raise_for_status()
+    REMINDERS_TOTAL.labels(outcome="dead_lettered").inc(len(habit_ids))
+    logger.error("Напоминание в очереди недоставленных", extra=extra)
+    try:
+        dead_letter(chat_id, text, habit_ids, failure, attempt)
+    except Exception:
+        logger.exception("Не удалось сохранить недоставленное напоминание", extra=extra)
+    return False
 
-            print(
-                f"Отправлено напоминание для привычки {habit.id} пользователю {habit.user}"
-            )
 
-        except TelegramUser.DoesNotExist:
-            print(f"Пользователь {habit.user} не привязал Telegram")
-            continue
-        except Exception as e:
-            print(f"Ошибка отправки сообщения для привычки {habit.id}: {e}")
+def schedule_retry(chat_id, habit_ids, attempt, retry_after=None):
+    """Ставит отложенную задачу повтора; False, если брокер недоступен"""
+    try:
+        deliver_reminder.apply_async(
+            (chat_id, habit_ids, attempt + 1),
+            countdown=retry_delay(attempt, retry_after),
+        )
+    except Exception:
+        logger.exception(
+            "Не удалось запланировать повтор",
+            extra={"chat_id": chat_id, "habit_ids": habit_ids, "attempt": attempt},
+        )
+        return False
+    REMINDER_RETRIES_TOTAL.inc()
+    REMINDERS_TOTAL.labels(outcome="retried").inc(len(habit_ids))
+    return True
+
+
+@shared_task(ignore_result=True)
+def deliver_reminder(chat_id, habit_ids, attempt, *legacy):
+    """Повторная отправка напоминания: текст собирается заново по id привычек.
+
+    В сообщении задачи только id, поэтому его размер не зависит от длины
+    сводки, а удалённые за время ожидания привычки в повтор не попадают.
+    Повторы, поставленные прежней версией, приходят как
+    (chat_id, text, habit_ids, attempt) и отправляются с сохранённым текстом;
+    поддержку этой формы можно убрать через релиз.
+    """
+    if legacy:
+        text, habit_ids, (attempt,) = habit_ids, attempt, legacy
+        return send_reminder_message(chat_id, text, habit_ids, attempt)
+
+    habits = list(
+        Habit.objects.filter(pk__in=habit_ids).select_related("related_habit")
+    )
+    if not habits:
+        # Все привычки удалены, пока повтор ждал: отправлять нечего
+        logger.info(
+            "Привычки повтора удалены",
+            extra={"chat_id": chat_id, "habit_ids": habit_ids, "attempt": attempt},
+        )
+        return True
+
+    delivered = True
+    for text, batch in reminder_messages(habits):
+        delivered &= send_reminder_message(
+            chat_id, text, [habit.id for habit in batch], attempt
+        )
+    return delivered
+
+
+def replay_dead_letters(limit=None, batch_size=500, enqueue=True):
+    """Повторяет недоставленные сообщения пачками по batch_size.
+
+    enqueue=True ставит задачи deliver_reminder (текст собирается заново),
+    иначе сохранённый текст отправляется в текущем процессе; сбои
+    обрабатываются как при рассылке (повтор или снова в очередь).
+    За один вызов обрабатывается не больше записей, чем было в очереди на старте,
+    чтобы вернувшиеся в конец очереди сообщения не зацикливали повтор.
+    Возвращает число обработанных записей.
+    """
+    pending = dead_letter_count()
+    limit = pending if limit is None else min(limit, pending)
+    replayed = 0
+    while replayed < limit:
+        count = min(batch_size, limit - replayed)
+        entries = take_dead_letters(count)
+        if not entries:
+            break
+        for index, entry in enumerate(entries):
+            try:
+                if enqueue:
+                    deliver_reminder.apply_async(
+                        (entry["chat_id"], entry["habit_ids"], 1)
+                    )
+                else:
+                    send_reminder_message(
+                        entry["chat_id"], entry["text"], entry["habit_ids"]
+                    )
+            except Exception:
+                # Пачка уже снята с очереди: остаток возвращается, чтобы не потерять
+                restore_dead_letters(entries[index:])
+                raise
+        replayed += len(entries)
+    return replayed
+
+
+# Результат рассылки никто не читает: без ignore_result каждый тик писал бы
+# ключ в result backend
+@shared_task(ignore_result=True)
+def send_telegram_reminder():
+    """Отправка напоминаний о привычках через Telegram"""
+    # Привычки из текущего окна рассылки с учётом часового пояса и периодичности
+    with REMINDER_QUERY_SECONDS.time():
+        habits_to_remind = due_habits(timezone.now())
+    REMINDER_DUE_HABITS.set(len(habits_to_remind))
+    logger.info("Окно рассылки", extra={"due_habits": len(habits_to_remind)})
+
+    chats = dict(
+        TelegramUser.objects.filter(
+            user_id__in={habit.user_id for habit in habits_to_remind}
+        ).values_list("user_id", "chat_id")
+    )
+    by_chat = {}
+    for habit in habits_to_remind:
+        chat_id = chats.get(habit.user_id)
+        if chat_id is None:
+            REMINDERS_TOTAL.labels(outcome="unlinked").inc()
+            logger.info(
+                "Пользователь не привязал Telegram",
+                extra={"habit_id": habit.id, "user_id": habit.user_id},
+            )
             continue
+        by_chat.setdefault(chat_id, []).append(habit)
+
+    # В режиме сводки все привычки чата из одного окна уходят одним сообщением
+    for chat_id, habits in by_chat.items():
+        with REMINDER_RENDER_SECONDS.time():
+            messages = reminder_messages(habits)
+        for text, batch in messages:
+            send_reminder_message(chat_id, text, [habit.id for habit in batch])
+
+
+# Пакетные задачи идемпотентны: подтверждение после выполнения, чтобы
+# перезапуск worker посреди пересчёта не терял задачу
+@shared_task(acks_late=True)
+def recalculate_habit_stats():
+    """Ночной пересчёт статистики выполнения привычек"""
+    updated = recalculate_stats()
+    logger.info("Пересчитана статистика привычек", extra={"habits": updated})
+    return updated
+
+
+@shared_task(acks_late=True)
+def refresh_habit_dispatch_index():
+    """Перестройка слотов рассылки для часовых поясов с переходом на летнее время"""
+    rebuilt = refresh_dispatch_index()
+    logger.info("Перестроены слоты рассылки", extra={"habits": rebuilt})
+    return rebuilt
+
+
+@shared_task(acks_late=True)
+def aggregate_trending_habits(full=False):
+    """Обновление рейтинга популярных публичных привычек в Redis"""
+    groups = aggregate_trending(full=full)
+    if groups is None:
+        logger.info("Рейтинг уже обновляется, прогон пропущен", extra={"full": full})
+        return None
+    logger.info(
+        "Обновлён рейтинг публичных привычек", extra={"groups": groups, "full": full}
+    )
+    return groups
@@ -1,16 +1,56 @@
+import json
+import logging
+import tempfile
+from datetime import date, datetime, time, timedelta
+from io import BytesIO, StringIO
+from pathlib import Path
 from unittest.mock import Mock, patch
+from zoneinfo import ZoneInfo
 
+import fakeredis
+from celery.schedules import crontab
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
-from django.test import TestCase
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from faker import Faker
+from redis.exceptions import RedisError
 from rest_framework import status
+from rest_framework.exceptions import ParseError
 from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
 
-from .models import Habit
+from bot.models import TelegramUser
+from config import renderers
+from config.beat import (LAST_RUN_KEY, LOCK_KEY, LeaderScheduler,
+                         load_schedule, parse_schedule, save_entry,
+                         seed_schedule)
+from config.celery import app as celery_app
+from config.db_router import STICKY_KEY, PrimaryReplicaRouter, current_replica
+from config.logging import JsonFormatter
+from config.profiling import (QueryBudgetExceeded, profiling_report,
+                              reset_profiling)
+from config.schema import clear_schema_cache, generate_schema
+
+from . import trending
+from .deadletter import dead_letter, dead_letter_count, peek_dead_letters
+from .dispatch import due_habits, zones_with_transitions
+from .metrics import REMINDERS_TOTAL
+from .models import Habit, HabitStats
 from .permissions import IsOwner
-from .serializers import HabitSerializer
-from .tasks import send_telegram_reminder
+from .reminders import TELEGRAM_MESSAGE_LIMIT, render_digest
+from .scheduling import due_mask, expand_occurrences
+from .serializers import (HABIT_READ_COLUMNS, HabitSerializer,
+                          serialize_habit_rows)
+from .stats import recalculate_stats, register_completion
+from .tasks import (deliver_reminder, recalculate_habit_stats,
+                    replay_dead_letters, retry_delay, send_reminder_message,
+                    send_telegram_reminder)
+from .trending import TRENDING_BUILD_KEY, TRENDING_KEY, aggregate_trending
 
 User = get_user_model()
 fake = Faker()
@@ -249,27 +289,1137 @@ class HabitTasksTest(TestCase):
     def setUp(self):
         self.user = UserFactory.create_user()
 
-    @patch("habits.tasks.TelegramUser.objects.get")
-    @patch("habits.tasks.requests.post")
-    def test_send_telegram_reminder_success(self, mock_post, mock_telegram_get):
+    @patch("requests.post")
+    def test_send_telegram_reminder_success(self, mock_post):
         """Тест успешной отправки напоминания"""
         # Настройка моков
-        mock_response = Mock()
+        mock_response = Mock(status_code=200)
         mock_response.raise_for_status.return_value = None
         mock_post.return_value = mock_response
 
-        mock_telegram_user = Mock()
-        mock_telegram_user.chat_id = "123456"
-        mock_telegram_get.return_value = mock_telegram_user
+        TelegramUser.objects.create(user=self.user, chat_id="123456")
 
         # Создаем тестовую привычку
         habit = HabitFactory.create_habit(user=self.user)
 
-        # Вызываем задачу
-        with patch("habits.tasks.Habit.objects.filter") as mock_filter:
-            mock_filter.return_value = [habit]
+        # Вызываем задачу во время привычки по часовому поясу пользователя
+        reminder_time = datetime.combine(
+            timezone.localdate(), habit.time, tzinfo=ZoneInfo(self.user.timezone)
+        )
+        with patch("habits.tasks.timezone.now", return_value=reminder_time):
             send_telegram_reminder()
 
         # Проверяем вызовы
-        mock_telegram_get.assert_called_once_with(user=self.user)
         mock_post.assert_called_once()
+        self.assertEqual(mock_post.call_args.kwargs["data"]["chat_id"], "123456")
+
+
+class TaskRoutingTest(TestCase):
+    """Тесты маршрутизации задач по очередям"""
+
+    def route(self, name):
+        options = celery_app.amqp.router.route({}, name)
+        return options["queue"].name, options["queue"].routing_key, options
+
+    def test_reminders_have_own_queue(self):
+        """Тест: напоминания уходят в отдельную очередь, тик раньше повторов"""
+        queue, routing_key, tick = self.route("habits.tasks.send_telegram_reminder")
+        self.assertEqual((queue, routing_key), ("reminders", "reminders"))
+        queue, _, retry = self.route("habits.tasks.deliver_reminder")
+        self.assertEqual(queue, "reminders")
+        self.assertLess(tick["priority"], retry["priority"])
+
+    def test_bulk_and_default_queues(self):
+        """Тест: пакетные задачи и задачи без маршрута не попадают к напоминаниям"""
+        self.assertEqual(self.route("habits.tasks.recalculate_habit_stats")[0], "bulk")
+        self.assertEqual(
+            self.route("habits.tasks.aggregate_trending_habits")[0], "bulk"
+        )
+        self.assertEqual(
+            self.route("habits.tasks.refresh_habit_dispatch_index")[0], "maintenance"
+        )
+        self.assertEqual(
+            self.route("config.celery.debug_task")[:2], ("default", "default")
+        )
+
+    def test_bulk_tasks_ack_late(self):
+        """Тест: идемпотентные пакетные задачи подтверждаются после выполнения"""
+        self.assertTrue(recalculate_habit_stats.acks_late)
+        self.assertFalse(send_telegram_reminder.acks_late)
+
+
+class HabitStatsTest(TestCase):
+    """Тесты для статистики выполнения привычек"""
+
+    def setUp(self):
+        self.user = UserFactory.create_user()
+        self.habit = HabitFactory.create_habit(user=self.user, periodicity=2)
+        self.today = date(2025, 1, 31)
+
+    def test_incremental_streak(self):
+        """Тест инкрементального подсчёта серий"""
+        for offset in (10, 8, 6, 1, 0):
+            stats, created = register_completion(
+                self.habit, self.today - timedelta(days=offset)
+            )
+            self.assertTrue(created)
+
+        self.assertEqual(stats.current_streak, 2)
+        self.assertEqual(stats.longest_streak, 3)
+        self.assertEqual(stats.total_completions, 5)
+        self.assertEqual(stats.completion_rate(self.today, 7), 0.75)
+        self.assertEqual(stats.streak_on(self.today + timedelta(days=3)), 0)
+
+    def test_duplicate_completion(self):
+        """Тест повторной отметки за тот же день"""
+        register_completion(self.habit, self.today)
+        stats, created = register_completion(self.habit, self.today)
+
+        self.assertFalse(created)
+        self.assertEqual(stats.total_completions, 1)
+
+    def test_batch_recalculation_matches_incremental(self):
+        """Тест совпадения ночного пересчёта с инкрементальным обновлением"""
+        for offset in (0, 3, 1, 40, 2, 20):
+            register_completion(self.habit, self.today - timedelta(days=offset))
+        incremental = HabitStats.objects.get(habit=self.habit)
+
+        HabitStats.objects.all().delete()
+        self.assertEqual(recalculate_stats(), 1)
+        batch = HabitStats.objects.get(habit=self.habit)
+
+        for field in (
+            "current_streak",
+            "longest_streak",
+            "total_completions",
+            "last_completed",
+            "recent_mask",
+        ):
+            self.assertEqual(getattr(batch, field), getattr(incremental, field))
+
+    def test_stats_api(self):
+        """Тест эндпоинтов отметки выполнения и статистики"""
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        response = client.post(f"/api/habits/{self.habit.id}/complete/")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = client.get(f"/api/habits/{self.habit.id}/stats/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["current_streak"], 1)
+        self.assertEqual(response.data["total_completions"], 1)
+
+
+class HabitSchedulingTest(TestCase):
+    """Тесты для расчёта расписания привычек"""
+
+    def test_expand_occurrences(self):
+        """Тест разворачивания расписания с учётом периодичности"""
+        indices, days = expand_occurrences(
+            ["2025-01-01", "2025-01-05", "2025-01-20"],
+            [3, 1, 7],
+            date(2025, 1, 4),
+            date(2025, 1, 10),
+        )
+
+        self.assertEqual(indices.tolist(), [0, 0, 0, 1, 1, 1, 1, 1, 1])
+        self.assertEqual(
+            [day.item().day for day in days], [4, 7, 10, 5, 6, 7, 8, 9, 10]
+        )
+
+    def test_due_mask(self):
+        """Тест маски привычек, которые нужно выполнить в день"""
+        mask = due_mask(
+            ["2025-01-01", "2025-01-01", "2025-01-10"], [2, 3, 1], date(2025, 1, 7)
+        )
+        self.assertEqual(mask.tolist(), [True, True, False])
+
+    def test_agenda_api(self):
+        """Тест эндпоинта расписания"""
+        user = UserFactory.create_user()
+        HabitFactory.create_habit(user=user, periodicity=2, time="07:00:00")
+        HabitFactory.create_habit(user=user, periodicity=1, time="06:00:00")
+        client = APIClient()
+        client.force_authenticate(user=user)
+        today = date.today()
+
+        response = client.get(
+            "/api/habits/agenda/",
+            {"from": today.isoformat(), "to": (today + timedelta(days=3)).isoformat()},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 6)
+        self.assertEqual(str(response.data[0]["time"]), "06:00:00")
+
+        response = client.get(
+            "/api/habits/agenda/", {"from": "2025-01-10", "to": "2025-01-01"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class HabitDispatchTest(TestCase):
+    """Тесты для индекса рассылки по часовым поясам"""
+
+    def setUp(self):
+        self.user = UserFactory.create_user()
+        self.user.timezone = "America/New_York"
+        self.user.save()
+        self.habit = HabitFactory.create_habit(user=self.user, time="08:00:00")
+
+    def test_due_habits_use_user_timezone(self):
+        """Тест: напоминание приходит по локальному времени пользователя"""
+        zone = ZoneInfo("America/New_York")
+        tomorrow = timezone.localdate(timezone.now(), zone) + timedelta(days=1)
+        local_moment = datetime.combine(tomorrow, time(8, 0), tzinfo=zone)
+        moscow_moment = datetime.combine(
+            tomorrow, time(8, 0), tzinfo=ZoneInfo("Europe/Moscow")
+        )
+
+        self.assertEqual(due_habits(local_moment), [self.habit])
+        self.assertEqual(due_habits(moscow_moment), [])
+
+    def test_timezone_change_rebuilds_slots(self):
+        """Тест перестройки слотов при смене часового пояса"""
+        self.user.timezone = "Asia/Tokyo"
+        self.user.save()
+
+        zone = ZoneInfo("Asia/Tokyo")
+        tomorrow = timezone.localdate(timezone.now(), zone) + timedelta(days=1)
+        moment = datetime.combine(tomorrow, time(8, 0), tzinfo=zone)
+        self.assertEqual(due_habits(moment), [self.habit])
+
+    def test_save_without_timezone_change_keeps_slots(self):
+        """Тест: сохранение пользователя без смены пояса не трогает слоты"""
+        user = get_user_model().objects.get(pk=self.user.pk)
+        user.first_name = "Иван"
+        with patch("habits.signals.rebuild_dispatch_index") as rebuild:
+            user.save()
+            user.timezone = "Asia/Tokyo"
+            user.save()
+        rebuild.assert_called_once()
+
+    def test_zones_with_transitions(self):
+        """Тест поиска часовых поясов с переходом на летнее время"""
+        now = datetime(2025, 3, 5, tzinfo=ZoneInfo("UTC"))
+        self.assertEqual(
+            zones_with_transitions(["America/New_York", "Europe/Moscow"], now),
+            ["America/New_York"],
+        )
+
+
+class ReminderMetricsTest(TestCase):
+    """Тесты для метрик и структурных логов рассылки"""
+
+    def test_metrics_endpoint(self):
+        """Тест эндпоинта метрик Prometheus"""
+        response = self.client.get("/metrics")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(b"habit_reminder_query_seconds", response.content)
+
+    @patch("requests.post")
+    def test_reminder_outcome_counters(self, mock_post):
+        """Тест счётчиков результатов отправки"""
+        user = UserFactory.create_user()
+        habit = HabitFactory.create_habit(user=user)
+        unlinked = REMINDERS_TOTAL.labels(outcome="unlinked")
+        before = unlinked._value.get()
+
+        reminder_time = datetime.combine(
+            timezone.localdate(), habit.time, tzinfo=ZoneInfo(user.timezone)
+        )
+        with patch("habits.tasks.timezone.now", return_value=reminder_time):
+            with self.assertLogs("habits.tasks", level="INFO") as logs:
+                send_telegram_reminder()
+
+        self.assertEqual(unlinked._value.get(), before + 1)
+        self.assertEqual(logs.records[-1].habit_id, habit.id)
+        mock_post.assert_not_called()
+
+    def test_json_formatter(self):
+        """Тест форматирования структурного лога"""
+        record = logging.LogRecord(
+            "habits.tasks", logging.INFO, "", 0, "Окно рассылки", (), None
+        )
+        record.due_habits = 3
+
+        payload = json.loads(JsonFormatter().format(record))
+        self.assertEqual(payload["message"], "Окно рассылки")
+        self.assertEqual(payload["due_habits"], 3)
+
+
+@override_settings(
+    MIDDLEWARE=["config.profiling.ProfilingMiddleware"] + settings.MIDDLEWARE,
+    PROFILING_ENFORCE_BUDGETS=True,
+)
+class QueryBudgetTest(APITestCase):
+    """Тесты бюджетов запросов к БД для эндпоинтов привычек"""
+
+    def setUp(self):
+        reset_profiling()
+        self.user = UserFactory.create_user()
+        # Настоящий JWT: бюджет учитывает запрос пользователя при аутентификации
+        access = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        pleasant = HabitFactory.create_habit(user=self.user, is_pleasant=True)
+        for _ in range(6):
+            self.habit = HabitFactory.create_habit(
+                user=self.user, related_habit=pleasant, is_public=True
+            )
+
+    def test_endpoints_within_budget(self):
+        """Тест: эндпоинты укладываются в объявленные бюджеты"""
+        for url in (
+            "/api/habits/",
+            "/api/habits/public/",
+            f"/api/habits/{self.habit.id}/",
+            f"/api/habits/{self.habit.id}/stats/",
+            "/api/habits/agenda/",
+            "/api/auth/profile/",
+        ):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+            self.assertIn("Server-Timing", response)
+
+        report = profiling_report()
+        self.assertEqual(report["HabitViewSet.list"]["requests"], 1)
+        # Быстрая сериализация списка учитывается хуком middleware
+        self.assertGreater(report["HabitViewSet.list"]["avg_serializer_ms"], 0)
+        self.assertIn("HabitViewSet.public", report)
+
+    @override_settings(PROFILING_QUERY_BUDGETS={"HabitViewSet.list": 0})
+    def test_budget_exceeded(self):
+        """Тест: превышение бюджета проваливает запрос"""
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get("/api/habits/")
+
+    def test_report_admin_only(self):
+        """Тест: отчёт профилирования доступен только администратору"""
+        response = self.client.get("/api/profiling/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save(update_fields=["is_staff"])
+        response = self.client.get("/api/profiling/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class HabitFastSerializationTest(APITestCase):
+    """Тесты для быстрого пути сериализации списков"""
+
+    def setUp(self):
+        self.user = UserFactory.create_user()
+        pleasant = HabitFactory.create_habit(
+            user=self.user, is_pleasant=True, is_public=True
+        )
+        HabitFactory.create_habit(
+            user=self.user, related_habit=pleasant, time="07:30:15", is_public=True
+        )
+        HabitFactory.create_habit(user=self.user, reward="кофе")
+
+    def test_rows_match_model_serializer(self):
+        """Тест: быстрый путь даёт ту же структуру, что HabitSerializer"""
+        queryset = Habit.objects.filter(user=self.user)
+
+        fast = serialize_habit_rows(queryset.values_list(*HABIT_READ_COLUMNS))
+        regular = HabitSerializer(queryset, many=True).data
+
+        self.assertEqual(fast, [dict(item) for item in regular])
+
+    def test_list_and_public_responses(self):
+        """Тест ответов list и public на быстром пути"""
+        self.client.force_authenticate(user=self.user)
+        expected = HabitSerializer(Habit.objects.filter(is_public=True), many=True).data
+
+        response = self.client.get("/api/habits/public/")
+        self.assertEqual(response.json()["results"], json.loads(json.dumps(expected)))
+
+        response = self.client.get("/api/habits/", {"is_pleasant": "true"})
+        self.assertEqual(response.json()["count"], 1)
+
+
+class FastJSONTest(TestCase):
+    """Тесты для JSON-рендерера и парсера на orjson"""
+
+    def setUp(self):
+        self.payload = {
+            "time": time(8, 30),
+            "created_at": datetime(2025, 1, 1, 12, 0, tzinfo=ZoneInfo("UTC")),
+            "local": datetime(2025, 1, 1, 15, 0, tzinfo=ZoneInfo("Europe/Moscow")),
+            "date": date(2025, 1, 1),
+            "action": "бегать",
+            1: [1.5, None],
+        }
+
+    def test_render_matches_drf(self):
+        """Тест: рендер совпадает со стандартным JSONRenderer"""
+        fast = renderers.FastJSONRenderer().render(self.payload)
+        regular = renderers.JSONRenderer().render(self.payload)
+
+        self.assertEqual(json.loads(fast), json.loads(regular))
+        self.assertIn('"created_at":"2025-01-01T12:00:00Z"', fast.decode())
+
+    def test_fallback_without_orjson(self):
+        """Тест отката на стандартные классы DRF без orjson"""
+        with patch.object(renderers, "orjson", None):
+            body = renderers.FastJSONRenderer().render(self.payload)
+            data = renderers.FastJSONParser().parse(BytesIO(body))
+
+        self.assertEqual(data["time"], "08:30:00")
+
+    def test_parse_errors(self):
+        """Тест ошибки разбора некорректного JSON"""
+        with self.assertRaises(ParseError):
+            renderers.FastJSONParser().parse(BytesIO(b"{bad json"))
+
+
+class ConditionalRequestTest(APITestCase):
+    """Тесты для ETag и Last-Modified на эндпоинтах привычек"""
+
+    def setUp(self):
+        self.user = UserFactory.create_user()
+        self.client.force_authenticate(user=self.user)
+        self.habit = HabitFactory.create_habit(user=self.user, is_public=True)
+
+    def test_list_not_modified(self):
+        """Тест: повторный запрос списка с If-None-Match получает 304"""
+        response = self.client.get("/api/habits/")
+        etag = response["ETag"]
+        self.assertNotIn("Last-Modified", response)
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/habits/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+
+        HabitFactory.create_habit(user=self.user)
+        response = self.client.get("/api/habits/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_list_changes_after_delete(self):
+        """Тест: после удаления привычки список не отдаётся как неизменный"""
+        etag = self.client.get("/api/habits/")["ETag"]
+        HabitFactory.create_habit(user=self.user).delete()
+        self.assertEqual(self.client.get("/api/habits/")["ETag"], etag)
+
+        self.habit.delete()
+        response = self.client.get(
+            "/api/habits/",
+            HTTP_IF_NONE_MATCH=etag,
+            HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["results"], [])
+
+    def test_list_changes_after_related_delete(self):
+        """Тест: удаление связанной привычки другого пользователя меняет ETag списка"""
+        author = UserFactory.create_user(email="author@example.com", username="author")
+        pleasant = HabitFactory.create_habit(
+            user=author, is_pleasant=True, is_public=True
+        )
+        HabitFactory.create_habit(user=self.user, related_habit=pleasant)
+        etag = self.client.get("/api/habits/")["ETag"]
+
+        pleasant.delete()
+
+        response = self.client.get("/api/habits/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(
+            [item["related_habit"] for item in response.json()["results"]],
+            [None, None],
+        )
+
+    def test_list_etag_depends_on_query(self):
+        """Тест: ETag списка зависит от параметров запроса"""
+        first = self.client.get("/api/habits/public/")
+        second = self.client.get("/api/habits/public/", {"page": 1})
+
+        self.assertNotEqual(first["ETag"], second["ETag"])
+
+    def test_retrieve_conditional(self):
+        """Тест условного запроса одной привычки"""
+        url = f"/api/habits/{self.habit.id}/"
+        response = self.client.get(url)
+
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        etag = response["ETag"]
+        self.habit.action = "читать"
+        self.habit.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["action"], "читать")
+
+
+class StaticSchemaTest(APITestCase):
+    """Тесты для схемы OpenAPI из файла сборки"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.settings_override = override_settings(
+            OPENAPI_SCHEMA_DIR=self.directory.name
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        clear_schema_cache()
+        self.addCleanup(clear_schema_cache)
+
+    def test_generate_command(self):
+        """Тест: команда пишет версионированный файл схемы"""
+        call_command("generate_schema", stdout=StringIO())
+
+        path = Path(self.directory.name) / "openapi-1.0.0.json"
+        schema = json.loads(path.read_text())
+        self.assertIn("/api/habits/{id}/", schema["paths"])
+
+    def test_operation_ids_unique(self):
+        """Тест: у копирования одной и набора привычек разные operationId"""
+        schema = json.loads(generate_schema())
+        self.assertEqual(
+            schema["paths"]["/api/habits/adopt/"]["post"]["operationId"],
+            "habits_adopt_bulk_create",
+        )
+        self.assertEqual(
+            schema["paths"]["/api/habits/{id}/adopt/"]["post"]["operationId"],
+            "habits_adopt_create",
+        )
+
+    def test_api_views_in_schema(self):
+        """Тест: эндпоинты на APIView описаны в схеме"""
+        paths = json.loads(generate_schema())["paths"]
+        link = paths["/api/auth/profile/telegram-link/"]["post"]
+        self.assertIn("201", link["responses"])
+        deletion = paths["/api/auth/deletions/{token}/"]["get"]["responses"]
+        self.assertIn("schema", deletion["200"]["content"]["application/json"])
+        self.assertIn("202", paths["/api/auth/profile/"]["delete"]["responses"])
+
+    def test_generate_without_orjson(self):
+        """Тест: без orjson схема пишется стандартным json"""
+        with patch("config.schema.orjson", None):
+            fallback = json.loads(generate_schema())
+        self.assertEqual(fallback, json.loads(generate_schema()))
+
+    def test_serves_file_with_etag(self):
+        """Тест: схема отдаётся из файла и кэшируется в памяти"""
+        path = Path(self.directory.name) / "openapi-1.0.0.json"
+        path.write_text('{"openapi": "3.0.3", "paths": {}}')
+
+        response = self.client.get("/api/schema/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)["openapi"], "3.0.3")
+
+        path.write_text("{}")
+        response = self.client.get("/api/schema/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_generates_once_without_file(self):
+        """Тест: без файла схема генерируется один раз на процесс"""
+        with patch("config.schema.generate_schema", return_value=b"{}") as generate:
+            self.client.get("/api/schema/")
+            self.client.get("/api/schema/")
+
+        generate.assert_called_once()
+
+
+class HabitSearchTest(APITestCase):
+    """Тесты для полнотекстового поиска публичных привычек"""
+
+    def setUp(self):
+        self.user = UserFactory.create_user()
+        self.run_park = HabitFactory.create_habit(
+            user=self.user, action="бегать", place="парк", is_public=True
+        )
+        self.run_home = HabitFactory.create_habit(
+            user=self.user, action="бегать по парку", place="парк", is_public=True
+        )
+        HabitFactory.create_habit(
+            user=self.user, action="читать", place="дом", is_public=True
+        )
+        HabitFactory.create_habit(
+            user=self.user, action="бегать", place="парк", is_public=False
+        )
+
+    def search(self, text):
+        response = self.client.get("/api/habits/public/", {"search": text})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item["id"] for item in response.json()["results"]]
+
+    def test_search_public_by_prefix(self):
+        """Тест: поиск по началу слова только среди публичных привычек"""
+        self.assertCountEqual(self.search("бег"), [self.run_park.id, self.run_home.id])
+        self.assertEqual(self.search("плавать"), [])
+
+    def test_search_ranking(self):
+        """Тест: привычка с большим числом совпадений выше в выдаче"""
+        self.assertEqual(self.search("парк")[0], self.run_home.id)
+
+    def test_index_follows_updates(self):
+        """Тест: индекс обновляется при изменении и удалении привычки"""
+        self.run_park.action = "плавать"
+        self.run_park.save()
+        self.assertEqual(self.search("плавать"), [self.run_park.id])
+
+        self.run_park.delete()
+        self.assertEqual(self.search("плавать"), [])
+
+    def test_search_ignored_outside_public(self):
+        """Тест: параметр search не влияет на список своих привычек"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get("/api/habits/", {"search": "читать"})
+
+        self.assertEqual(response.json()["count"], 4)
+
+
+class TrendingHabitsTest(APITestCase):
+    """Тесты для рейтинга популярных публичных привычек"""
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        patcher = patch("habits.trending.get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = UserFactory.create_user()
+        self.run = HabitFactory.create_habit(
+            user=self.user, action="Бегать", place="Парк", is_public=True
+        )
+        for _ in range(2):
+            HabitFactory.create_habit(user=self.user, action="бегать ", place="парк")
+        self.read = HabitFactory.create_habit(
+            user=self.user, action="читать", place="дом", is_public=True
+        )
+        HabitFactory.create_habit(user=self.user, action="спать", place="дом")
+
+    def test_aggregate_scores(self):
+        """Тест: оценка группы — все привычки плюс вес недавних"""
+        self.assertEqual(aggregate_trending(), 3)
+        Habit.objects.filter(pk=self.read.pk).update(
+            created_at=timezone.now() - timedelta(days=30)
+        )
+        aggregate_trending(full=True)
+
+        self.assertEqual(
+            self.redis.zrevrange(TRENDING_KEY, 0, -1, withscores=True),
+            [(str(self.run.pk), 18.0), (str(self.read.pk), 1.0)],
+        )
+
+    def test_full_rebuild_keeps_live_ranking(self):
+        """Тест: во время полной перестройки эндпоинт видит прежний рейтинг"""
+        aggregate_trending()
+        previous = self.redis.zrange(TRENDING_KEY, 0, -1, withscores=True)
+        seen = []
+
+        def rescore(client, groups, today, ranking_key):
+            seen.append(self.redis.zrange(TRENDING_KEY, 0, -1, withscores=True))
+            return original(client, groups, today, ranking_key)
+
+        original = trending._rescore
+        with patch("habits.trending._rescore", side_effect=rescore):
+            aggregate_trending(full=True)
+
+        self.assertEqual(seen, [previous])
+        self.assertEqual(
+            self.redis.zrange(TRENDING_KEY, 0, -1, withscores=True), previous
+        )
+        self.assertFalse(self.redis.exists(TRENDING_BUILD_KEY))
+
+    def test_concurrent_run_skipped(self):
+        """Тест: пока идёт прогон, второй пропускается и не удваивает счётчики"""
+        aggregate_trending()
+        counts = self.redis.hgetall(trending.COUNTS_KEY)
+
+        self.redis.set(trending.LOCK_KEY, "другой прогон")
+        self.redis.delete(trending.STATE_KEY)
+        self.assertIsNone(aggregate_trending())
+        self.assertEqual(self.redis.hgetall(trending.COUNTS_KEY), counts)
+        self.assertEqual(self.redis.get(trending.LOCK_KEY), "другой прогон")
+
+        self.redis.delete(trending.LOCK_KEY)
+        aggregate_trending(full=True)
+        self.assertEqual(self.redis.hgetall(trending.COUNTS_KEY), counts)
+        self.assertFalse(self.redis.exists(trending.LOCK_KEY))
+
+    def test_incremental_update(self):
+        """Тест: повторный прогон учитывает только новые и опубликованные привычки"""
+        aggregate_trending()
+        HabitFactory.create_habit(user=self.user, action="бегать", place="парк")
+        sleep = Habit.objects.get(action="спать")
+        sleep.is_public = True
+        sleep.save()
+
+        self.assertEqual(aggregate_trending(), 2)
+        self.assertEqual(self.redis.zscore(TRENDING_KEY, str(self.run.pk)), 24)
+        self.assertEqual(self.redis.zscore(TRENDING_KEY, str(sleep.pk)), 6)
+
+    def test_trending_endpoint(self):
+        """Тест: эндпоинт отдаёт страницу рейтинга без пересчёта"""
+        aggregate_trending()
+        self.run.delete()
+
+        response = self.client.get("/api/habits/public/trending/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["id"] for item in response.json()["results"]], [self.read.pk]
+        )
+        self.assertEqual(response.json()["results"][0]["trending_score"], 6)
+        self.assertIsNone(self.redis.zscore(TRENDING_KEY, str(self.run.pk)))
+
+    def test_trending_paging(self):
+        """Тест постраничной выдачи рейтинга"""
+        for index in range(5):
+            HabitFactory.create_habit(
+                user=self.user, action=f"привычка {index}", place="дом", is_public=True
+            )
+        aggregate_trending()
+
+        first = self.client.get("/api/habits/public/trending/").json()
+        second = self.client.get(first["next"]).json()
+
+        self.assertEqual(first["count"], 7)
+        self.assertEqual(len(first["results"]), 5)
+        self.assertEqual(len(second["results"]), 2)
+        self.assertIsNone(second["next"])
+        self.assertIsNotNone(second["previous"])
+
+
+class HabitAdoptionTest(APITestCase):
+    """Тесты для копирования публичных привычек"""
+
+    def setUp(self):
+        self.author = UserFactory.create_user()
+        self.user = UserFactory.create_user()
+        self.client.force_authenticate(user=self.user)
+        self.pleasant = HabitFactory.create_habit(
+            user=self.author, action="принять ванну", is_pleasant=True
+        )
+        self.useful = HabitFactory.create_habit(
+            user=self.author,
+            action="бегать",
+            related_habit=self.pleasant,
+            is_public=True,
+            periodicity=2,
+        )
+
+    def test_adopt_with_related(self):
+        """Тест: копируется привычка вместе со связанной приятной"""
+        response = self.client.post(f"/api/habits/{self.useful.id}/adopt/")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        copy = Habit.objects.get(user=self.user, action="бегать")
+        self.assertEqual(copy.periodicity, 2)
+        self.assertFalse(copy.is_public)
+        self.assertEqual(copy.related_habit.user, self.user)
+        self.assertEqual(copy.related_habit.action, "принять ванну")
+        self.assertEqual(copy.dispatch_slots.count(), 7)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_adopt_private_not_found(self):
+        """Тест: непубличную привычку скопировать нельзя"""
+        response = self.client.post(f"/api/habits/{self.pleasant.id}/adopt/")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_bulk_adopt_pack(self):
+        """Тест: набор из 50 привычек копируется фиксированным числом запросов"""
+        pack = [self.useful.id]
+        for index in range(49):
+            pack.append(
+                HabitFactory.create_habit(
+                    user=self.author,
+                    action=f"привычка {index}",
+                    related_habit=self.pleasant if index % 2 else None,
+                    is_public=True,
+                ).id
+            )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                "/api/habits/adopt/", {"ids": pack}, format="json"
+            )
+        inserts = [
+            q for q in queries if q["sql"].startswith('INSERT INTO "habits_habit"')
+        ]
+        self.assertEqual(len(inserts), 2)
+        self.assertLessEqual(len(queries), 10)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Habit.objects.filter(user=self.user).count(), 51)
+        self.assertEqual(
+            Habit.objects.filter(user=self.user, is_pleasant=True).count(), 1
+        )
+
+    def test_bulk_adopt_missing(self):
+        """Тест: ошибка, если часть привычек не публичная или не существует"""
+        response = self.client.post(
+            "/api/habits/adopt/",
+            {"ids": [self.useful.id, self.pleasant.id]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(str(self.pleasant.id), response.json()["ids"])
+        self.assertFalse(Habit.objects.filter(user=self.user).exists())
+
+
+class ReminderDigestTest(TestCase):
+    """Тесты для сводки напоминаний по чату"""
+
+    def setUp(self):
+        self.user = UserFactory.create_user()
+        TelegramUser.objects.create(user=self.user, chat_id="555")
+        self.habits = [
+            HabitFactory.create_habit(user=self.user, action=f"привычка {index}")
+            for index in range(3)
+        ]
+
+    def send(self, mock_post):
+        mock_post.return_value = Mock(status_code=200)
+        reminder_time = datetime.combine(
+            timezone.localdate(),
+            self.habits[0].time,
+            tzinfo=ZoneInfo(self.user.timezone),
+        )
+        with patch("habits.tasks.timezone.now", return_value=reminder_time):
+            send_telegram_reminder()
+
+    @patch("requests.post")
+    def test_one_message_per_chat(self, mock_post):
+        """Тест: привычки одного окна уходят в чат одним сообщением"""
+        sent = REMINDERS_TOTAL.labels(outcome="sent")
+        before = sent._value.get()
+
+        self.send(mock_post)
+
+        mock_post.assert_called_once()
+        text = mock_post.call_args.kwargs["data"]["text"]
+        for habit in self.habits:
+            self.assertIn(habit.action, text)
+        self.assertEqual(sent._value.get(), before + 3)
+
+    @override_settings(REMINDER_DIGEST=False)
+    @patch("requests.post")
+    def test_digest_disabled(self, mock_post):
+        """Тест: без сводки по сообщению на привычку"""
+        self.send(mock_post)
+
+        self.assertEqual(mock_post.call_count, 3)
+
+    def test_split_under_limit(self):
+        """Тест: длинная сводка делится на сообщения не длиннее лимита"""
+        habits = [
+            Habit(
+                action="а" * 200,
+                place="дом",
+                time=time(8, index % 60),
+                duration=60,
+                periodicity=1,
+            )
+            for index in range(60)
+        ]
+
+        messages = render_digest(habits)
+
+        self.assertGreater(len(messages), 1)
+        self.assertEqual(sum(len(batch) for _, batch in messages), 60)
+        for text, _ in messages:
+            self.assertLessEqual(len(text), TELEGRAM_MESSAGE_LIMIT)
+
+
+class ReminderRetryTest(TestCase):
+    """Тесты для повторов отправки и очереди недоставленных"""
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        patcher = patch("habits.deadletter.get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch("habits.tasks.deliver_reminder.apply_async")
+    @patch("requests.post")
+    def test_retry_scheduled_with_backoff(self, mock_post, mock_apply):
+        """Тест: временная ошибка планирует повтор с задержкой Telegram"""
+        mock_post.return_value = Mock(
+            status_code=429,
+            json=Mock(return_value={"parameters": {"retry_after": 30}}),
+        )
+
+        self.assertFalse(send_reminder_message("1", "текст", [5]))
+
+        args, kwargs = mock_apply.call_args
+        self.assertEqual(args[0], ("1", [5], 2))
+        self.assertGreaterEqual(kwargs["countdown"], 30)
+        self.assertEqual(dead_letter_count(), 0)
+
+    @patch("requests.post")
+    def test_deliver_renders_from_ids(self, mock_post):
+        """Тест: повтор собирает текст по id, удалённые привычки пропускаются"""
+        mock_post.return_value = Mock(status_code=200)
+        user = UserFactory.create_user()
+        kept = HabitFactory.create_habit(user=user, action="читать книгу")
+        deleted = HabitFactory.create_habit(user=user)
+        habit_ids = [kept.id, deleted.id]
+        deleted.delete()
+
+        self.assertTrue(deliver_reminder("1", habit_ids, 2))
+
+        mock_post.assert_called_once()
+        self.assertIn("читать книгу", mock_post.call_args.kwargs["data"]["text"])
+
+    @patch("requests.post")
+    def test_deliver_skips_deleted_habits(self, mock_post):
+        """Тест: если все привычки удалены до повтора, сообщение не отправляется"""
+        habit = HabitFactory.create_habit(user=UserFactory.create_user())
+        habit_ids = [habit.id]
+        habit.delete()
+
+        with override_settings(REMINDER_DIGEST=True):
+            self.assertTrue(deliver_reminder("1", habit_ids, 2))
+
+        mock_post.assert_not_called()
+        self.assertEqual(render_digest([]), [])
+
+    @patch("requests.post")
+    def test_deliver_accepts_legacy_arguments(self, mock_post):
+        """Тест: повтор прежней версии (с текстом) отправляется как есть"""
+        mock_post.return_value = Mock(status_code=200)
+
+        self.assertTrue(deliver_reminder("1", "старый текст", [7], 2))
+
+        self.assertEqual(mock_post.call_args.kwargs["data"]["text"], "старый текст")
+
+    def test_notification_results_ignored(self):
+        """Тест: задачи уведомлений не пишут результат в result backend"""
+        self.assertTrue(send_telegram_reminder.ignore_result)
+        self.assertTrue(deliver_reminder.ignore_result)
+        self.assertFalse(recalculate_habit_stats.ignore_result)
+
+    def test_retry_delay_bounds(self):
+        """Тест: задержка растёт экспоненциально и ограничена сверху"""
+        with patch("habits.tasks.random.uniform", side_effect=lambda low, high: high):
+            self.assertEqual(retry_delay(1), 10)
+            self.assertEqual(retry_delay(3), 40)
+            self.assertEqual(retry_delay(20), 900)
+
+    @patch("requests.post")
+    def test_dead_letter_after_last_attempt(self, mock_post):
+        """Тест: после последней попытки сообщение попадает в DLQ"""
+        mock_post.return_value = Mock(status_code=502)
+
+        send_reminder_message("1", "текст", [5], attempt=5)
+        mock_post.return_value = Mock(status_code=403)
+        send_reminder_message("2", "текст", [6])
+
+        entries = peek_dead_letters()
+        self.assertEqual([entry["chat_id"] for entry in entries], ["1", "2"])
+        self.assertEqual(entries[1]["error"], "Telegram: 403")
+
+    @patch("requests.post")
+    def test_replay(self, mock_post):
+        """Тест повтора очереди: успешные удаляются, сбойные возвращаются"""
+        for index in range(5):
+            dead_letter(str(index), "текст", [index], "Telegram: 502", 5)
+        mock_post.side_effect = [Mock(status_code=200)] * 4 + [Mock(status_code=403)]
+
+        call_command(
+            "reminder_dlq", "replay", "--sync", "--batch-size", "2", stdout=StringIO()
+        )
+
+        self.assertEqual(mock_post.call_count, 5)
+        self.assertEqual([entry["chat_id"] for entry in peek_dead_letters()], ["4"])
+
+    @patch("habits.tasks.deliver_reminder.apply_async")
+    def test_replay_keeps_unsent_on_broker_failure(self, apply_async):
+        """Тест: при сбое брокера неотправленные записи остаются в очереди"""
+        for index in range(5):
+            dead_letter(str(index), "текст", [index], "Telegram: 502", 5)
+        apply_async.side_effect = [None, OSError("broker down")]
+
+        with self.assertRaises(OSError):
+            replay_dead_letters(batch_size=3)
+
+        self.assertEqual(
+            [entry["chat_id"] for entry in peek_dead_letters()], ["1", "2", "3", "4"]
+        )
+
+
+class BeatLeaderSchedulerTest(TestCase):
+    """Тесты планировщика beat с выбором лидера"""
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        patcher = patch("config.beat.get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Тик рассылки давно не запускался и уже должен быть отправлен
+        self.redis.hset(LAST_RUN_KEY, "send-habit-reminders", 0)
+
+    def tick(self, scheduler):
+        # Брокер не нужен: проверяется только выбор отправляемых записей
+        with (
+            patch.object(LeaderScheduler, "producer", Mock()),
+            patch.object(LeaderScheduler, "apply_entry") as apply_entry,
+        ):
+            scheduler.tick()
+        return [call.args[0].name for call in apply_entry.call_args_list]
+
+    def test_only_leader_sends(self):
+        """Тест: из двух реплик задачу отправляет только держатель блокировки"""
+        first = LeaderScheduler(app=celery_app)
+        second = LeaderScheduler(app=celery_app)
+
+        self.assertEqual(self.tick(first), ["send-habit-reminders"])
+        self.assertEqual(self.tick(second), [])
+        self.assertTrue(first.is_leader)
+        self.assertFalse(second.is_leader)
+        self.assertEqual(self.redis.get(LOCK_KEY), first.node)
+        self.assertLessEqual(self.redis.ttl(LOCK_KEY), settings.BEAT_LOCK_TTL)
+
+    def test_failover_does_not_repeat_tick(self):
+        """Тест: после потери лидера реплика продолжает без повторной отправки"""
+        first = LeaderScheduler(app=celery_app)
+        second = LeaderScheduler(app=celery_app)
+        self.tick(first)
+
+        # Блокировка истекла: лидер завис или упал
+        self.redis.delete(LOCK_KEY)
+        self.assertEqual(self.tick(second), [])
+        self.assertTrue(second.is_leader)
+        self.assertEqual(self.tick(first), [])
+        self.assertFalse(first.is_leader)
+
+        second.close()
+        self.assertIsNone(self.redis.get(LOCK_KEY))
+
+    def test_runtime_schedule_edit(self):
+        """Тест: новая и отключённая записи подхватываются без перезапуска"""
+        scheduler = LeaderScheduler(app=celery_app)
+        self.tick(scheduler)
+
+        call_command(
+            "beat_schedule",
+            "set",
+            "debug",
+            "--task",
+            "config.celery.debug_task",
+            "--schedule",
+            "60",
+            stdout=StringIO(),
+        )
+        self.redis.hset(LAST_RUN_KEY, "debug", 0)
+        self.assertEqual(self.tick(scheduler), ["debug"])
+
+        call_command("beat_schedule", "disable", "debug", stdout=StringIO())
+        self.tick(scheduler)
+        self.assertNotIn("debug", scheduler.schedule)
+
+    def test_seed_keeps_edits_until_reset(self):
+        """Тест: перезапуск beat не затирает изменения, reset возвращает настройки"""
+        save_entry(
+            "send-habit-reminders",
+            {"task": "habits.tasks.send_telegram_reminder", "schedule": "*/1 * * * *"},
+        )
+        seed_schedule()
+        self.assertEqual(
+            load_schedule()["send-habit-reminders"]["schedule"], "*/1 * * * *"
+        )
+
+        call_command("beat_schedule", "reset", stdout=StringIO())
+        schedule = load_schedule()
+        self.assertEqual(schedule["send-habit-reminders"]["schedule"], "*/5 * * * *")
+        self.assertEqual(set(schedule), set(settings.BEAT_SCHEDULE))
+
+    def test_parse_schedule(self):
+        """Тест разбора cron-строки и интервала"""
+        self.assertEqual(parse_schedule("30 */6 * * *"), crontab(minute=30, hour="*/6"))
+        self.assertEqual(parse_schedule(90).run_every, timedelta(seconds=90))
+        with self.assertRaises(ValueError):
+            parse_schedule("*/5 * *")
+
+
+@override_settings(REPLICA_DATABASES=["replica_1"])
+class ReadReplicaRoutingTest(APITestCase):
+    """Тесты чтения с реплики и привязки к primary после записи"""
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        patcher = patch("config.db_router.get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = UserFactory.create_user(
+            email="replica@example.com", username="replicauser"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.reads = []
+
+    def get(self, url):
+        """GET, который запоминает, куда роутер направил чтение привычек"""
+
+        def db_for_read(router, model, **hints):
+            if model is Habit:
+                self.reads.append(current_replica())
+            # Отдельной реплики в тестах нет: запрос выполняется на default
+            return "default"
+
+        with patch.object(
+            PrimaryReplicaRouter, "db_for_read", autospec=True, side_effect=db_for_read
+        ):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_list_reads_from_replica(self):
+        """Тест: список и публичные привычки читаются с реплики"""
+        self.get("/api/habits/")
+        self.get("/api/habits/public/")
+        self.assertEqual(set(self.reads), {"replica_1"})
+        self.assertIsNone(current_replica())
+
+    def test_reads_stick_to_primary_after_write(self):
+        """Тест: после записи пользователь читает свои данные с primary"""
+        response = self.client.post(
+            "/api/habits/",
+            {"place": "Дом", "time": "08:00:00", "action": "зарядка", "duration": 60},
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.get("/api/habits/")
+        self.assertEqual(set(self.reads), {None})
+        self.assertLessEqual(
+            self.redis.ttl(STICKY_KEY.format(self.user.pk)),
+            settings.REPLICA_STICKY_SECONDS,
+        )
+
+        self.redis.delete(STICKY_KEY.format(self.user.pk))
+        self.reads.clear()
+        self.get("/api/habits/")
+        self.assertEqual(set(self.reads), {"replica_1"})
+
+    def test_trending_keeps_ranking_on_replica(self):
+        """Тест: отсутствующая на реплике привычка не удаляется из рейтинга"""
+        with patch("habits.trending.get_redis", return_value=self.redis):
+            self.redis.zadd(TRENDING_KEY, {"999999": 5})
+            self.get("/api/habits/public/trending/")
+        self.assertEqual(set(self.reads), {"replica_1"})
+        self.assertEqual(self.redis.zscore(TRENDING_KEY, "999999"), 5)
+
+    def test_redis_failure_reads_from_primary(self):
+        """Тест: без Redis привязку проверить нельзя, чтение идёт с primary"""
+        self.redis.exists = Mock(side_effect=RedisError)
+        self.get("/api/habits/")
+        self.assertEqual(set(self.reads), {None})
+
+    def test_router_writes_and_migrates_on_primary(self):
+        """Тест: запись и миграции только на primary"""
+        router = PrimaryReplicaRouter()
+        self.assertEqual(router.db_for_write(Habit), "default")
+        self.assertTrue(router.allow_migrate("default", "habits"))
+        self.assertFalse(router.allow_migrate("replica_1", "habits"))
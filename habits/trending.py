@@ -0,0 +1,207 @@
+import secrets
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from config.redis import get_redis
+
+from .models import Habit
+
+# Рейтинг: id публичной привычки-представителя группы -> оценка
+TRENDING_KEY = "habits:trending"
+# Рейтинг при полной перестройке; по готовности переименовывается в TRENDING_KEY
+TRENDING_BUILD_KEY = "habits:trending:build"
+# Группа (действие|место) -> всего привычек
+COUNTS_KEY = "habits:trending:counts"
+# Группа -> id публичной привычки, которая показывается в рейтинге
+MEMBERS_KEY = "habits:trending:members"
+# Группа -> привычек создано за день (ключ живёт TRENDING_RECENT_DAYS + 1 дней)
+DAY_KEY = "habits:trending:day:{}"
+# Водяные знаки инкрементальной агрегации: last_id, updated_at, day
+STATE_KEY = "habits:trending:state"
+# Блокировка прогона: полная перестройка и инкрементальный прогон (или два
+# медленных инкрементальных) не должны идти одновременно — иначе новые
+# привычки посчитаются дважды
+LOCK_KEY = "habits:trending:lock"
+BATCH_SIZE = 5000
+
+# Снятие только своей блокировки (чужую могли взять после истечения TTL)
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def habit_group(action, place):
+    """Группа одинаковых привычек: действие и место без учёта регистра"""
+    return f"{action.strip().lower()}|{place.strip().lower()}"
+
+
+def _day_keys(today):
+    return [
+        DAY_KEY.format((today - timedelta(days=offset)).isoformat())
+        for offset in range(settings.TRENDING_RECENT_DAYS)
+    ]
+
+
+def _count_new_habits(client, last_id, today):
+    """Счётчики групп по привычкам с id больше last_id"""
+    window_start = today - timedelta(days=settings.TRENDING_RECENT_DAYS - 1)
+    ttl = timedelta(days=settings.TRENDING_RECENT_DAYS + 1)
+    touched = set()
+    rows = (
+        Habit.objects.filter(pk__gt=last_id)
+        .order_by("pk")
+        .values_list("pk", "action", "place", "is_public", "created_at")
+    )
+    pipe = client.pipeline(transaction=False)
+    for pk, action, place, is_public, created_at in rows.iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        group = habit_group(action, place)
+        touched.add(group)
+        pipe.hincrby(COUNTS_KEY, group, 1)
+        day = timezone.localdate(created_at)
+        if day >= window_start:
+            key = DAY_KEY.format(day.isoformat())
+            pipe.hincrby(key, group, 1)
+            pipe.expire(key, ttl)
+        if is_public:
+            pipe.hsetnx(MEMBERS_KEY, group, pk)
+        last_id = pk
+        if len(pipe) >= BATCH_SIZE:
+            pipe.execute()
+    pipe.execute()
+    return touched, last_id
+
+
+def _publish_updated(client, last_id, since):
+    """Группы привычек, ставших публичными после прошлого прогона"""
+    touched = set()
+    rows = Habit.objects.filter(
+        pk__lte=last_id, is_public=True, updated_at__gt=since
+    ).values_list("pk", "action", "place")
+    pipe = client.pipeline(transaction=False)
+    for pk, action, place in rows.iterator(chunk_size=BATCH_SIZE):
+        group = habit_group(action, place)
+        touched.add(group)
+        pipe.hsetnx(MEMBERS_KEY, group, pk)
+    pipe.execute()
+    return touched
+
+
+def _rescore(client, groups, today, ranking_key=TRENDING_KEY):
+    day_keys = _day_keys(today)
+    weight = settings.TRENDING_RECENT_WEIGHT
+    groups = sorted(groups)
+    for start in range(0, len(groups), BATCH_SIZE):
+        end = start + BATCH_SIZE
+        chunk = groups[start:end]
+        pipe = client.pipeline(transaction=False)
+        pipe.hmget(COUNTS_KEY, chunk)
+        pipe.hmget(MEMBERS_KEY, chunk)
+        for key in day_keys:
+            pipe.hmget(key, chunk)
+        totals, members, *days = pipe.execute()
+
+        # Представители, удалённые или скрытые после попадания в рейтинг
+        alive = {
+            str(pk)
+            for pk in Habit.objects.filter(
+                pk__in=[int(member) for member in members if member],
+                is_public=True,
+            ).values_list("pk", flat=True)
+        }
+        stale = [
+            (group, member)
+            for group, member in zip(chunk, members)
+            if member and member not in alive
+        ]
+        if stale:
+            client.hdel(MEMBERS_KEY, *[group for group, _ in stale])
+            client.zrem(ranking_key, *[member for _, member in stale])
+
+        scores = {}
+        for index, member in enumerate(members):
+            if member not in alive:
+                continue
+            recent = sum(int(day[index] or 0) for day in days)
+            scores[member] = int(totals[index] or 0) + weight * recent
+        if scores:
+            client.zadd(ranking_key, scores)
+
+
+def aggregate_trending(now=None, full=False):
+    """Инкрементальное обновление рейтинга публичных привычек в Redis.
+
+    Оценка группы — число всех привычек с тем же действием и местом плюс
+    TRENDING_RECENT_WEIGHT за каждую созданную в последние TRENDING_RECENT_DAYS
+    дней. Пересчитываются только затронутые группы; при смене дня — все, так как
+    окно «недавних» сдвигается. Удалённые представители групп выпадают из
+    рейтинга до появления новой публичной привычки группы или полного прогона
+    (full=True), который строит рейтинг заново во временном ключе: до RENAME
+    эндпоинт отдаёт прежний рейтинг, а не пустой или неполный.
+    Возвращает число пересчитанных групп или None, если идёт другой прогон.
+    """
+    client = get_redis()
+    token = secrets.token_hex(16)
+    if not client.set(LOCK_KEY, token, nx=True, px=settings.TRENDING_LOCK_TTL * 1000):
+        return None
+    try:
+        return _aggregate(client, now or timezone.now(), full)
+    finally:
+        client.eval(RELEASE_SCRIPT, 1, LOCK_KEY, token)
+
+
+def _aggregate(client, now, full):
+    today = timezone.localdate(now)
+    ranking_key = TRENDING_BUILD_KEY if full else TRENDING_KEY
+    if full:
+        client.delete(
+            TRENDING_BUILD_KEY, COUNTS_KEY, MEMBERS_KEY, STATE_KEY, *_day_keys(today)
+        )
+
+    state = client.hgetall(STATE_KEY)
+    previous_id = int(state.get("last_id", 0))
+    touched, last_id = _count_new_habits(client, previous_id, today)
+    if "updated_at" in state:
+        touched |= _publish_updated(
+            client, previous_id, datetime.fromisoformat(state["updated_at"])
+        )
+    if state.get("day") != today.isoformat():
+        touched |= set(client.hkeys(COUNTS_KEY))
+
+    _rescore(client, touched, today, ranking_key)
+    if full:
+        if client.exists(TRENDING_BUILD_KEY):
+            client.rename(TRENDING_BUILD_KEY, TRENDING_KEY)
+        else:
+            # Публичных привычек нет: RENAME несуществующего ключа — ошибка
+            client.delete(TRENDING_KEY)
+    client.hset(
+        STATE_KEY,
+        mapping={
+            "last_id": last_id,
+            "updated_at": now.isoformat(),
+            "day": today.isoformat(),
+        },
+    )
+    return len(touched)
+
+
+def trending_page(offset, limit):
+    """Страница рейтинга: пары (id привычки, оценка) и общее число позиций"""
+    pipe = get_redis().pipeline(transaction=False)
+    pipe.zrevrange(TRENDING_KEY, offset, offset + limit - 1, withscores=True)
+    pipe.zcard(TRENDING_KEY)
+    members, count = pipe.execute()
+    return [(int(member), int(score)) for member, score in members], count
+
+
+def discard_trending(habit_ids):
+    """Убирает из рейтинга удалённые или скрытые привычки"""
+    if habit_ids:
+        get_redis().zrem(TRENDING_KEY, *habit_ids)
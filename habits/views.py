@@ -1,36 +1,202 @@
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import permissions, viewsets
+from drf_spectacular.utils import extend_schema
+from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
-from .models import Habit
+from config.db_router import ReadReplicaMixin, current_replica
+
+from .adoption import adopt_habits
+from .conditional import (list_validators, not_modified, object_validators,
+                          set_validators)
+from .filters import HabitSearchFilter
+from .models import Habit, HabitStats
 from .permissions import IsOwner
-from .serializers import HabitSerializer
+from .scheduling import build_agenda
+from .serializers import (HABIT_READ_COLUMNS, AgendaQuerySerializer,
+                          HabitAdoptSerializer, HabitCompletionSerializer,
+                          HabitSerializer, HabitStatsSerializer,
+                          TrendingQuerySerializer, serialize_habit_rows)
+from .stats import register_completion
+from .trending import discard_trending, trending_page
 
 
-class HabitViewSet(viewsets.ModelViewSet):
+class HabitViewSet(ReadReplicaMixin, viewsets.ModelViewSet):
     serializer_class = HabitSerializer
-    filter_backends = [DjangoFilterBackend]
+    filter_backends = [DjangoFilterBackend, HabitSearchFilter]
     filterset_fields = ["is_pleasant", "is_public"]
+    # Списки и чтение без записи идут на реплику (если она настроена)
+    read_replica_actions = ("list", "retrieve", "public", "trending", "agenda")
 
     def get_queryset(self):
-        if self.action == "public":
+        if getattr(self, "swagger_fake_view", False):
+            # Генерация схемы OpenAPI идёт без пользователя
+            return Habit.objects.none()
+        if self.action in ("public", "trending"):
             return Habit.objects.filter(is_public=True)
+        if self.action in ("adopt", "adopt_bulk"):
+            return Habit.objects.filter(is_public=True).select_related("related_habit")
         return Habit.objects.filter(user=self.request.user)
 
+    @property
+    def throttle_scope(self):
+        # Лимит только на анонимные списки публичных привычек
+        if self.action in ("public", "trending"):
+            return "public"
+        return None
+
     def get_permissions(self):
-        if self.action == "public":
+        if self.action in ("public", "trending"):
             return [permissions.AllowAny()]
+        if self.action in ("adopt", "adopt_bulk"):
+            return [permissions.IsAuthenticated()]
         return [permissions.IsAuthenticated(), IsOwner()]
 
+    def list(self, request, *args, **kwargs):
+        return self.list_rows()
+
     @action(detail=False, methods=["get"])
     def public(self, request):
         """Список публичных привычек"""
+        return self.list_rows()
+
+    @action(detail=False, methods=["get"], url_path="public/trending")
+    def trending(self, request):
+        """Популярные публичные привычки из рейтинга в Redis"""
+        serializer = TrendingQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        number = serializer.validated_data["page"]
+        page_size = self.paginator.get_page_size(request)
+
+        ranked, count = trending_page((number - 1) * page_size, page_size)
+        rows = {
+            row[0]: row
+            for row in self.get_queryset()
+            .filter(pk__in=[pk for pk, _ in ranked])
+            .values_list(*HABIT_READ_COLUMNS)
+        }
+        if current_replica() is None:
+            # Отставшая реплика может ещё не видеть новую привычку: чистить
+            # рейтинг можно только по данным primary
+            discard_trending([pk for pk, _ in ranked if pk not in rows])
+
+        results = serialize_habit_rows([rows[pk] for pk, _ in ranked if pk in rows])
+        scores = [score for pk, score in ranked if pk in rows]
+        for item, score in zip(results, scores):
+            item["trending_score"] = score
+
+        url = request.build_absolute_uri()
+        return Response(
+            {
+                "count": count,
+                "next": (
+                    replace_query_param(url, "page", number + 1)
+                    if number * page_size < count
+                    else None
+                ),
+                "previous": (
+                    replace_query_param(url, "page", number - 1) if number > 1 else None
+                ),
+                "results": results,
+            }
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, last_modified = object_validators(request, instance)
+        response = not_modified(request, etag, last_modified)
+        if response is None:
+            response = Response(self.get_serializer(instance).data)
+        return set_validators(response, etag, last_modified)
+
+    def list_rows(self):
+        """Список привычек через values_list без экземпляров модели"""
         queryset = self.filter_queryset(self.get_queryset())
-        page = self.paginate_queryset(queryset)
+        etag = list_validators(self.request, queryset)
+        response = not_modified(self.request, etag, None)
+        if response is not None:
+            return set_validators(response, etag, None)
+
+        rows = queryset.values_list(*HABIT_READ_COLUMNS)
+        page = self.paginate_queryset(rows)
         if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            response = self.get_paginated_response(serialize_habit_rows(page))
+        else:
+            response = Response(serialize_habit_rows(rows))
+        return set_validators(response, etag, None)
+
+    @action(detail=False, methods=["get"])
+    def agenda(self, request):
+        """Расписание привычек пользователя на диапазон дат"""
+        serializer = AgendaQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(
+            build_agenda(
+                queryset,
+                serializer.validated_data["from"],
+                serializer.validated_data["to"],
+            )
+        )
+
+    @action(detail=True, methods=["post"])
+    def complete(self, request, pk=None):
+        """Отметка о выполнении привычки"""
+        habit = self.get_object()
+        serializer = HabitCompletionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        day = serializer.validated_data.get("date", timezone.localdate())
+
+        stats, created = register_completion(habit, day)
+        return Response(
+            HabitStatsSerializer(stats).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+    @action(detail=True, methods=["get"])
+    def stats(self, request, pk=None):
+        """Статистика выполнения привычки"""
+        habit = self.get_object()
+        stats = HabitStats.objects.filter(habit=habit).first() or HabitStats()
+        stats.habit = habit
+        return Response(HabitStatsSerializer(stats).data)
+
+    @action(detail=True, methods=["post"])
+    def adopt(self, request, pk=None):
+        """Копирование публичной привычки в свой аккаунт"""
+        created = adopt_habits(request.user, [self.get_object()])
+        return Response(
+            self.get_serializer(created, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+    # Путь совпадает с adopt без {id}: без явного operationId они конфликтуют
+    @extend_schema(
+        operation_id="habits_adopt_bulk_create",
+        request=HabitAdoptSerializer,
+        responses={201: HabitSerializer(many=True)},
+    )
+    @action(detail=False, methods=["post"], url_path="adopt")
+    def adopt_bulk(self, request):
+        """Копирование набора публичных привычек одним запросом"""
+        serializer = HabitAdoptSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(serializer.validated_data["ids"]))
+
+        found = self.get_queryset().in_bulk(ids)
+        missing = [pk for pk in ids if pk not in found]
+        if missing:
+            raise ValidationError(
+                {
+                    "ids": f"Публичные привычки не найдены: {', '.join(map(str, missing))}"
+                }
+            )
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        created = adopt_habits(request.user, [found[pk] for pk in ids])
+        return Response(
+            self.get_serializer(created, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
@@ -21,7 +21,10 @@ class CustomUserAdmin(UserAdmin):
 
     fieldsets = (
         (None, {"fields": ("username", "password")}),
-        ("Personal info", {"fields": ("first_name", "last_name", "email")}),
+        (
+            "Personal info",
+            {"fields": ("first_name", "last_name", "email", "timezone")},
+        ),
         (
             "Permissions",
             {
@@ -0,0 +1,126 @@
+"""Чёрный список refresh-токенов: таблица simplejwt и быстрая проверка в Redis.
+
+Каждый отозванный jti дублируется в Redis ключом с TTL до истечения токена.
+Пока есть метка WARM_KEY, Redis содержит полный список и отсутствие ключа
+означает, что токен не отозван, — проверка обходится без запроса к БД. Без
+метки (Redis очищен или ещё не прогрет) проверка идёт в БД, а задача
+warm_token_blacklist восстанавливает список. Метка живёт
+JWT_BLACKLIST_WARM_TTL секунд (не дольше периода задачи): если процесс не
+смог записать jti и не успел снять метку, список перезагрузится из БД. Redis не должен вытеснять ключи
+(maxmemory-policy noeviction, как и для брокера Celery).
+"""
+
+import logging
+
+from django.conf import settings
+from django.utils import timezone
+from redis.exceptions import RedisError
+from rest_framework_simplejwt.token_blacklist.models import (BlacklistedToken,
+                                                             OutstandingToken)
+
+from config.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+BLACKLIST_KEY = "jwt:blacklist:{}"
+# Метка полноты: список в Redis загружен из БД
+WARM_KEY = "jwt:blacklist:warm"
+BATCH_SIZE = 5000
+
+
+def _ttl(expires_at, now):
+    return max(int((expires_at - now).total_seconds()) + 1, 1)
+
+
+# Запись в Redis не удалась: список там неполон, и метку полноты нужно снять,
+# как только Redis снова доступен (до этого проверки и так идут в БД)
+_warm_invalid = False
+
+
+def cache_blacklisted(jti, expires_at):
+    """Добавляет jti в Redis до истечения токена"""
+    global _warm_invalid
+    now = timezone.now()
+    if expires_at <= now:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=True)
+        if _warm_invalid:
+            pipe.delete(WARM_KEY)
+        pipe.set(BLACKLIST_KEY.format(jti), 1, ex=_ttl(expires_at, now))
+        pipe.execute()
+    except RedisError:
+        logger.warning("Отозванный токен не записан в Redis", extra={"jti": jti})
+        _warm_invalid = True
+    else:
+        _warm_invalid = False
+
+
+def is_blacklisted(jti):
+    """Отозван ли токен: Redis, а при неполном списке или сбое Redis — БД"""
+    global _warm_invalid
+    try:
+        pipe = get_redis().pipeline(transaction=True)
+        if _warm_invalid:
+            pipe.delete(WARM_KEY)
+        pipe.exists(BLACKLIST_KEY.format(jti))
+        pipe.exists(WARM_KEY)
+        listed, warm = pipe.execute()[-2:]
+    except RedisError:
+        logger.warning("Redis недоступен, чёрный список токенов проверяется в БД")
+    else:
+        _warm_invalid = False
+        if listed:
+            return True
+        if warm:
+            return False
+    return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+
+def warm_blacklist_cache(batch_size=BATCH_SIZE, force=False):
+    """Загружает действующие отозванные токены в Redis и ставит метку полноты.
+
+    Без force ничего не делает, если метка уже есть. Возвращает число
+    загруженных токенов.
+    """
+    client = get_redis()
+    if not force and client.exists(WARM_KEY):
+        return 0
+    now = timezone.now()
+    rows = (
+        BlacklistedToken.objects.filter(token__expires_at__gt=now)
+        .values_list("token__jti", "token__expires_at")
+        .iterator(chunk_size=batch_size)
+    )
+    loaded = 0
+    pipe = client.pipeline(transaction=False)
+    for jti, expires_at in rows:
+        pipe.set(BLACKLIST_KEY.format(jti), 1, ex=_ttl(expires_at, now))
+        loaded += 1
+        if loaded % batch_size == 0:
+            pipe.execute()
+    pipe.set(WARM_KEY, now.isoformat(), ex=settings.JWT_BLACKLIST_WARM_TTL)
+    pipe.execute()
+    return loaded
+
+
+def prune_outstanding_tokens(batch_size=BATCH_SIZE, now=None):
+    """Удаляет истёкшие токены (и их записи в чёрном списке) пачками.
+
+    Каждая пачка — отдельный короткий DELETE по первичному ключу, поэтому
+    очистка большой таблицы не держит длинных блокировок. Возвращает число
+    удалённых токенов.
+    """
+    now = now or timezone.now()
+    pruned = 0
+    while True:
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lte=now)
+            .order_by("expires_at")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return pruned
+        BlacklistedToken.objects.filter(token_id__in=ids).delete()
+        OutstandingToken.objects.filter(id__in=ids).delete()
+        pruned += len(ids)
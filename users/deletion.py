@@ -0,0 +1,146 @@
+"""Асинхронное удаление аккаунта пачками.
+
+Обычный User.delete() загружает в память все привычки пользователя (каскад)
+и обнуляет related_habit отдельными UPDATE — для большого аккаунта это долгий
+запрос и долгие блокировки. Здесь привычки удаляются пачками по
+ACCOUNT_DELETION_BATCH_SIZE: на каждую пачку по одному DELETE/UPDATE на
+таблицу, каждая пачка — в своей короткой транзакции. Ход удаления хранится
+в Redis по одноразовому токену, который возвращается клиенту.
+"""
+
+import secrets
+
+from django.conf import settings
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth import get_user_model
+from django.db import models, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from bot.models import TelegramUser
+from config.redis import get_redis
+from habits.models import Habit
+from habits.trending import discard_trending
+
+# Токен удаления -> {user_id, status, habits_total, habits_deleted}
+DELETION_KEY = "users:deletion:{}"
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+def start_account_deletion(user):
+    """Заводит запись о ходе удаления и отключает аккаунт; возвращает токен.
+
+    Запись в Redis идёт первой: если Redis недоступен, аккаунт остаётся активным.
+    """
+    token = secrets.token_urlsafe(16)
+    key = DELETION_KEY.format(token)
+    pipe = get_redis().pipeline(transaction=True)
+    pipe.hset(
+        key,
+        mapping={
+            "user_id": user.pk,
+            "status": PENDING,
+            "habits_total": Habit.objects.filter(user=user).count(),
+            "habits_deleted": 0,
+        },
+    )
+    pipe.expire(key, settings.ACCOUNT_DELETION_STATUS_TTL)
+    pipe.execute()
+
+    user.is_active = False
+    user.save(update_fields=["is_active"])
+    return token
+
+
+def cancel_account_deletion(user, token):
+    """Откат start_account_deletion, если задачу не удалось поставить в очередь"""
+    get_redis().delete(DELETION_KEY.format(token))
+    user.is_active = True
+    user.save(update_fields=["is_active"])
+
+
+def deletion_progress(token):
+    """Ход удаления по токену или None, если токен неизвестен или истёк"""
+    progress = get_redis().hgetall(DELETION_KEY.format(token))
+    if not progress:
+        return None
+    return {
+        "status": progress["status"],
+        "habits_total": int(progress["habits_total"]),
+        "habits_deleted": int(progress["habits_deleted"]),
+    }
+
+
+def set_deletion_status(token, status):
+    key = DELETION_KEY.format(token)
+    pipe = get_redis().pipeline(transaction=True)
+    pipe.hset(key, "status", status)
+    pipe.expire(key, settings.ACCOUNT_DELETION_STATUS_TTL)
+    pipe.execute()
+
+
+def delete_habit_batch(ids):
+    """Удаляет привычки и их дочерние записи без загрузки объектов.
+
+    Повторяет каскад Django по связям Habit: SET_NULL — один UPDATE, CASCADE —
+    один DELETE на таблицу. Дочерние таблицы (выполнения, статистика, слоты
+    рассылки) сами ни на что не ссылаются, поэтому каскад одноуровневый.
+    """
+    now = timezone.now()
+    for relation in Habit._meta.related_objects:
+        model = relation.related_model
+        related = model._base_manager.filter(**{f"{relation.field.name}__in": ids})
+        if relation.on_delete is models.SET_NULL:
+            # update() не заполняет auto_now сам, а по updated_at считается ETag
+            changes = {relation.field.name: None}
+            for field in model._meta.concrete_fields:
+                if getattr(field, "auto_now", False):
+                    changes[field.name] = now
+            related.update(**changes)
+        else:
+            related._raw_delete(related.db)
+    habits = Habit._base_manager.filter(pk__in=ids)
+    habits._raw_delete(habits.db)
+
+
+def delete_account_data(user_id, token, batch_size=None):
+    """Удаляет аккаунт: сначала привычки пачками, затем самого пользователя.
+
+    Пачки идемпотентны: после сбоя задача повторяется и продолжает
+    с оставшихся привычек. Возвращает число удалённых привычек.
+    """
+    batch_size = batch_size or settings.ACCOUNT_DELETION_BATCH_SIZE
+    key = DELETION_KEY.format(token)
+    client = get_redis()
+    client.hset(key, "status", RUNNING)
+
+    # Чат отвязывается первым: напоминания перестают уходить сразу
+    TelegramUser.objects.filter(user_id=user_id).delete()
+
+    deleted = 0
+    while True:
+        ids = list(
+            Habit.objects.filter(user_id=user_id)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        with transaction.atomic():
+            delete_habit_batch(ids)
+        discard_trending(ids)
+        deleted += len(ids)
+        client.hincrby(key, "habits_deleted", len(ids))
+
+    with transaction.atomic():
+        # Журнал админки удалился бы каскадом, выданные токены остаются без владельца
+        LogEntry.objects.filter(user_id=user_id).delete()
+        OutstandingToken.objects.filter(user_id=user_id).update(user=None)
+        get_user_model().objects.filter(pk=user_id).delete()
+
+    set_deletion_status(token, DONE)
+    return deleted
@@ -0,0 +1,33 @@
+from django.db import migrations
+
+INDEX = "token_blacklist_outstandingtoken_expires_at_idx"
+
+
+def create_index(apps, schema_editor):
+    # Индекс для пакетной очистки истёкших токенов; на PostgreSQL строится без
+    # блокировки записи в большую таблицу
+    concurrently = (
+        "CONCURRENTLY " if schema_editor.connection.vendor == "postgresql" else ""
+    )
+    schema_editor.execute(
+        f"CREATE INDEX {concurrently}IF NOT EXISTS {INDEX} "
+        "ON token_blacklist_outstandingtoken (expires_at)"
+    )
+
+
+def drop_index(apps, schema_editor):
+    schema_editor.execute(f"DROP INDEX IF EXISTS {INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("users", "0002_user_timezone"),
+        ("token_blacklist", "0012_alter_outstandingtoken_user"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
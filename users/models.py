@@ -1,9 +1,29 @@
+from functools import lru_cache
+from zoneinfo import available_timezones
+
 from django.contrib.auth.models import AbstractUser
+from django.core.exceptions import ValidationError
 from django.db import models
 
 
+@lru_cache(maxsize=1)
+def timezone_names():
+    return frozenset(available_timezones())
+
+
+def validate_timezone(value):
+    if value not in timezone_names():
+        raise ValidationError(f"Неизвестный часовой пояс: {value}")
+
+
 class User(AbstractUser):
     email = models.EmailField(unique=True, verbose_name="Email")
+    timezone = models.CharField(
+        max_length=64,
+        default="Europe/Moscow",
+        validators=[validate_timezone],
+        verbose_name="Часовой пояс",
+    )
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username"]
@@ -14,3 +34,11 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.email
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Сохранённый часовой пояс: слоты рассылки перестраиваются только при его смене
+        if "timezone" in field_names:
+            instance._saved_timezone = instance.timezone
+        return instance
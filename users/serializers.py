@@ -1,8 +1,11 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from .tokens import CachedRefreshToken
+
 User = get_user_model()
 
 
@@ -19,6 +22,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             "first_name",
             "last_name",
             "username",
+            "timezone",
         ]
 
     def validate(self, attrs):
@@ -37,7 +41,16 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
-        fields = ["id", "email", "username", "first_name", "last_name", "date_joined"]
+        fields = [
+            "id",
+            "email",
+            "username",
+            "first_name",
+            "last_name",
+            "timezone",
+            "date_joined",
+        ]
+        read_only_fields = ["id", "email", "date_joined"]
 
 
 class UserWithTokensSerializer(serializers.ModelSerializer):
@@ -52,6 +65,7 @@ class UserWithTokensSerializer(serializers.ModelSerializer):
             "username",
             "first_name",
             "last_name",
+            "timezone",
             "date_joined",
             "access",
             "refresh",
@@ -64,3 +78,27 @@ class UserWithTokensSerializer(serializers.ModelSerializer):
     def get_refresh(self, obj):
         refresh = RefreshToken.for_user(obj)
         return str(refresh)
+
+
+class CachedTokenRefreshSerializer(TokenRefreshSerializer):
+    """Обновление токена с проверкой чёрного списка через Redis"""
+
+    token_class = CachedRefreshToken
+
+
+class AccountDeletionSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(
+        choices=["pending", "running", "done", "failed"], read_only=True
+    )
+    habits_total = serializers.IntegerField(read_only=True)
+    habits_deleted = serializers.IntegerField(read_only=True)
+
+
+class AccountDeletionStartSerializer(AccountDeletionSerializer):
+    status_url = serializers.URLField(read_only=True)
+
+
+class TelegramLinkSerializer(serializers.Serializer):
+    token = serializers.CharField(read_only=True)
+    url = serializers.URLField(read_only=True, allow_null=True)
+    expires_in = serializers.IntegerField(read_only=True)
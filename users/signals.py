@@ -0,0 +1,14 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .blacklist import cache_blacklisted
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def cache_blacklisted_token(sender, instance, created, **kwargs):
+    """Отзыв токена любым путём (ротация, админка) попадает в Redis после коммита"""
+    if created:
+        jti, expires_at = instance.token.jti, instance.token.expires_at
+        transaction.on_commit(lambda: cache_blacklisted(jti, expires_at))
@@ -0,0 +1,46 @@
+import logging
+
+from celery import shared_task
+from django.conf import settings
+
+from .blacklist import prune_outstanding_tokens, warm_blacklist_cache
+from .deletion import FAILED, delete_account_data, set_deletion_status
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(acks_late=True)
+def prune_expired_tokens():
+    """Ночная очистка истёкших refresh-токенов пачками"""
+    pruned = prune_outstanding_tokens()
+    logger.info("Удалены истёкшие токены", extra={"tokens": pruned})
+    return pruned
+
+
+@shared_task(ignore_result=True)
+def warm_token_blacklist():
+    """Восстановление чёрного списка в Redis, если метка полноты пропала"""
+    loaded = warm_blacklist_cache()
+    if loaded:
+        logger.info("Чёрный список токенов загружен в Redis", extra={"tokens": loaded})
+
+
+# Повтор безопасен (delete_account_data идемпотентна); статус failed —
+# только после последней попытки
+@shared_task(
+    bind=True,
+    acks_late=True,
+    autoretry_for=(Exception,),
+    max_retries=settings.ACCOUNT_DELETION_MAX_RETRIES,
+    retry_backoff=True,
+)
+def delete_account(self, user_id, token):
+    """Удаление аккаунта пачками; ход — в Redis по токену удаления"""
+    try:
+        deleted = delete_account_data(user_id, token)
+    except Exception:
+        if self.request.retries >= self.max_retries:
+            set_deletion_status(token, FAILED)
+        raise
+    logger.info("Аккаунт удалён", extra={"user_id": user_id, "habits": deleted})
+    return deleted
@@ -1,10 +1,29 @@
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+import fakeredis
+from django.conf import settings
+from django.contrib.admin.models import LogEntry
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.utils import timezone
 from faker import Faker
+from redis.exceptions import ConnectionError
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.token_blacklist.models import (BlacklistedToken,
+                                                             OutstandingToken)
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from bot.models import TelegramUser
+from config.throttling import RedisScopedRateThrottle
+from habits.models import Habit, HabitCompletion, HabitDispatchSlot, HabitStats
+from habits.stats import register_completion
 
+from .blacklist import (BLACKLIST_KEY, WARM_KEY, is_blacklisted,
+                        prune_outstanding_tokens, warm_blacklist_cache)
 from .serializers import UserRegistrationSerializer, UserSerializer
+from .tasks import delete_account
 
 User = get_user_model()
 fake = Faker()
@@ -118,3 +137,341 @@ class UserAPITest(APITestCase):
         """Тест получения профиля без аутентификации"""
         response = self.client.get("/api/auth/profile/")
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_user_profile_update_timezone(self):
+        """Тест смены часового пояса в профиле"""
+        user = User.objects.create_user(
+            email="tz@example.com", password="tzpass123", username="tzuser"
+        )
+        self.client.force_authenticate(user=user)
+
+        response = self.client.patch("/api/auth/profile/", {"timezone": "Asia/Tokyo"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertEqual(user.timezone, "Asia/Tokyo")
+
+        response = self.client.patch("/api/auth/profile/", {"timezone": "Mars/Base"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RateLimitTest(APITestCase):
+    """Тесты ограничения частоты запросов скользящим окном в Redis"""
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        patcher = patch("config.throttling.get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        rates = patch.dict(
+            RedisScopedRateThrottle.THROTTLE_RATES,
+            {"login": "2/min", "public": "2/min"},
+        )
+        rates.start()
+        self.addCleanup(rates.stop)
+        self.now = 1000.0
+        timer = patch.object(
+            RedisScopedRateThrottle, "timer", side_effect=lambda: self.now
+        )
+        timer.start()
+        self.addCleanup(timer.stop)
+
+    def login(self, ip="10.0.0.1", **extra):
+        return self.client.post(
+            "/api/auth/login/",
+            {"email": "nobody@example.com", "password": "wrong"},
+            REMOTE_ADDR=ip,
+            **extra,
+        )
+
+    def test_login_limited_per_ip(self):
+        """Тест: после лимита вход отвечает 429 с Retry-After, другой IP не затронут"""
+        self.assertEqual(self.login().status_code, status.HTTP_401_UNAUTHORIZED)
+        self.now += 10
+        self.assertEqual(self.login().status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.login()
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "50")
+        self.assertEqual(
+            self.login(ip="10.0.0.2").status_code, status.HTTP_401_UNAUTHORIZED
+        )
+
+    def test_forwarded_for_ignored_without_proxy(self):
+        """Тест: без прокси подменой X-Forwarded-For новый лимит не получить"""
+        for index in range(2):
+            self.login(HTTP_X_FORWARDED_FOR=f"192.0.2.{index}")
+        response = self.login(HTTP_X_FORWARDED_FOR="192.0.2.99")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_window_slides(self):
+        """Тест: место освобождается, когда первый запрос выходит из окна"""
+        self.login()
+        self.now += 30
+        self.login()
+        self.now += 31
+        self.assertEqual(self.login().status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.login().status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_public_habits_scope(self):
+        """Тест: лимит публичного списка не распространяется на профиль"""
+        for _ in range(2):
+            self.client.get("/api/habits/public/")
+        response = self.client.get("/api/habits/public/")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        user = User.objects.create_user(
+            email="limits@example.com", password="pass12345", username="limits"
+        )
+        self.client.force_authenticate(user=user)
+        for _ in range(3):
+            response = self.client.get("/api/auth/profile/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_fail_open_without_redis(self):
+        """Тест: при недоступном Redis запросы не блокируются"""
+        broken = Mock()
+        broken.evalsha.side_effect = ConnectionError("Redis недоступен")
+        with patch("config.throttling.get_redis", return_value=broken):
+            for _ in range(3):
+                response = self.login()
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TokenBlacklistTest(APITestCase):
+    """Тесты чёрного списка refresh-токенов и быстрой проверки в Redis"""
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        patcher = patch("users.blacklist.get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(
+            email="tokens@example.com", password="tokenpass123", username="tokens"
+        )
+
+    def refresh(self, token):
+        return self.client.post("/api/auth/token/refresh/", {"refresh": str(token)})
+
+    def test_rotated_token_is_rejected(self):
+        """Тест: после ротации старый refresh-токен отклоняется"""
+        token = RefreshToken.for_user(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.refresh(token)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("refresh", response.data)
+        self.assertTrue(self.redis.exists(BLACKLIST_KEY.format(token["jti"])))
+
+        response = self.refresh(token)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_warm_cache_skips_database(self):
+        """Тест: с меткой полноты проверка не обращается к БД"""
+        token = RefreshToken.for_user(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            token.blacklist()
+        self.redis.flushall()
+
+        # Без метки — проверка в БД
+        with self.assertNumQueries(1):
+            self.assertTrue(is_blacklisted(token["jti"]))
+
+        self.assertEqual(warm_blacklist_cache(), 1)
+        with self.assertNumQueries(0):
+            self.assertTrue(is_blacklisted(token["jti"]))
+            self.assertFalse(is_blacklisted("unknown"))
+
+    def test_missed_write_drops_warm_marker(self):
+        """Тест: при сбое записи в Redis метка полноты снимается"""
+        warm_blacklist_cache()
+        broken = Mock()
+        broken.pipeline.return_value.execute.side_effect = ConnectionError()
+        token = RefreshToken.for_user(self.user)
+        with (
+            patch("users.blacklist.get_redis", return_value=broken),
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            token.blacklist()
+
+        self.assertTrue(is_blacklisted(token["jti"]))
+        self.assertFalse(self.redis.exists(WARM_KEY))
+
+    def test_warm_marker_expires(self):
+        """Тест: метка полноты истекает, пропущенный jti подхватывается из БД"""
+        warm_blacklist_cache()
+        self.assertLessEqual(self.redis.ttl(WARM_KEY), settings.JWT_BLACKLIST_WARM_TTL)
+
+        # Процесс записал отзыв в БД, но не в Redis и не снял метку
+        token = RefreshToken.for_user(self.user)
+        token.blacklist()
+        self.assertFalse(is_blacklisted(token["jti"]))
+
+        self.redis.delete(WARM_KEY)  # истечение TTL
+        self.assertTrue(is_blacklisted(token["jti"]))
+        self.assertEqual(warm_blacklist_cache(), 1)
+        self.assertTrue(is_blacklisted(token["jti"]))
+
+    def test_blacklist_mirrored_after_commit(self):
+        """Тест: jti попадает в Redis только после коммита транзакции"""
+        token = RefreshToken.for_user(self.user)
+        with self.captureOnCommitCallbacks() as callbacks:
+            token.blacklist()
+            self.assertFalse(self.redis.exists(BLACKLIST_KEY.format(token["jti"])))
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertTrue(self.redis.exists(BLACKLIST_KEY.format(token["jti"])))
+
+    def test_prune_expired_tokens(self):
+        """Тест: пакетная очистка удаляет только истёкшие токены"""
+        now = timezone.now()
+        for index in range(5):
+            token = OutstandingToken.objects.create(
+                user=self.user,
+                jti=f"expired-{index}",
+                token="token",
+                expires_at=now - timedelta(days=1),
+            )
+            BlacklistedToken.objects.create(token=token)
+        RefreshToken.for_user(self.user)
+
+        self.assertEqual(prune_outstanding_tokens(batch_size=2), 5)
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+
+class AccountDeletionTest(APITestCase):
+    """Тесты асинхронного удаления аккаунта пачками"""
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        for target in ("users.deletion.get_redis", "habits.trending.get_redis"):
+            patcher = patch(target, return_value=self.redis)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(
+            email="delete@example.com", password="deletepass123", username="delete"
+        )
+        self.other = User.objects.create_user(
+            email="keep@example.com", password="keeppass123", username="keep"
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def create_habit(self, user, **kwargs):
+        return Habit.objects.create(
+            user=user,
+            place="Дом",
+            time="08:00:00",
+            action="зарядка",
+            duration=60,
+            **kwargs,
+        )
+
+    def test_delete_returns_202_and_removes_account_in_batches(self):
+        """Тест: DELETE профиля отвечает 202, задача удаляет всё пачками"""
+        pleasant = self.create_habit(self.user, is_pleasant=True, is_public=True)
+        for _ in range(4):
+            habit = self.create_habit(self.user, related_habit=pleasant)
+            register_completion(habit, timezone.localdate())
+        # Чужая привычка со ссылкой на удаляемую остаётся, ссылка обнуляется
+        adopted = self.create_habit(self.other, related_habit=pleasant)
+        adopted_updated_at = adopted.updated_at
+        TelegramUser.objects.create(user=self.user, chat_id="100")
+        LogEntry.objects.create(
+            user=self.user, content_type=None, object_repr="habit", action_flag=1
+        )
+        RefreshToken.for_user(self.user)
+
+        with (
+            override_settings(ACCOUNT_DELETION_BATCH_SIZE=2),
+            patch(
+                "users.views.delete_account.delay", side_effect=delete_account
+            ) as delay,
+        ):
+            response = self.client.delete("/api/auth/profile/")
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["habits_total"], 5)
+        delay.assert_called_once()
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(Habit.objects.filter(user_id=self.user.pk).exists())
+        self.assertFalse(HabitCompletion.objects.exists())
+        self.assertFalse(HabitStats.objects.exists())
+        self.assertFalse(HabitDispatchSlot.objects.exclude(habit=adopted).exists())
+        self.assertFalse(TelegramUser.objects.exists())
+        self.assertFalse(LogEntry.objects.exists())
+        self.assertFalse(OutstandingToken.objects.filter(user__isnull=False).exists())
+        adopted.refresh_from_db()
+        self.assertIsNone(adopted.related_habit)
+        self.assertGreater(adopted.updated_at, adopted_updated_at)
+
+        progress = self.client.get(response.data["status_url"])
+        self.assertEqual(
+            progress.data, {"status": "done", "habits_total": 5, "habits_deleted": 5}
+        )
+
+    def test_account_disabled_until_task_runs(self):
+        """Тест: аккаунт отключается сразу, ход удаления доступен по токену"""
+        self.create_habit(self.user)
+        with patch("users.views.delete_account.delay") as delay:
+            response = self.client.delete("/api/auth/profile/")
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertEqual(delay.call_args.args[0], self.user.pk)
+
+        token = delay.call_args.args[1]
+        progress = self.client.get(f"/api/auth/deletions/{token}/")
+        self.assertEqual(progress.data["status"], "pending")
+        self.assertEqual(
+            self.client.get("/api/auth/deletions/unknown/").status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+
+    def test_broker_failure_keeps_account(self):
+        """Тест: если задачу не поставить в очередь, аккаунт остаётся активным"""
+        with (
+            patch("users.views.delete_account.delay", side_effect=OSError),
+            self.assertRaises(OSError),
+        ):
+            self.client.delete("/api/auth/profile/")
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_active)
+        self.assertEqual(self.redis.keys("users:deletion:*"), [])
+
+    def test_redis_failure_keeps_account(self):
+        """Тест: если запись о ходе удаления не сохранить, аккаунт не отключается"""
+        broken = Mock()
+        broken.pipeline.return_value.execute.side_effect = ConnectionError()
+        with (
+            patch("users.deletion.get_redis", return_value=broken),
+            patch("users.views.delete_account.delay") as delay,
+            self.assertRaises(ConnectionError),
+        ):
+            self.client.delete("/api/auth/profile/")
+
+        delay.assert_not_called()
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_active)
+
+    def test_task_retries_before_failing(self):
+        """Тест: задача повторяется после сбоя, failed — когда повторы исчерпаны"""
+        self.create_habit(self.user)
+        with patch("users.views.delete_account.delay") as delay:
+            self.client.delete("/api/auth/profile/")
+        token = delay.call_args.args[1]
+
+        statuses = []
+
+        def fail(user_id, token):
+            statuses.append(self.redis.hget(f"users:deletion:{token}", "status"))
+            raise OSError
+
+        with patch("users.tasks.delete_account_data", side_effect=fail):
+            result = delete_account.apply(args=(self.user.pk, token))
+
+        self.assertIsInstance(result.result, OSError)
+        self.assertEqual(len(statuses), settings.ACCOUNT_DELETION_MAX_RETRIES + 1)
+        self.assertNotIn("failed", statuses)
+        self.assertEqual(self.redis.hget(f"users:deletion:{token}", "status"), "failed")
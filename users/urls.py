@@ -1,12 +1,18 @@
 from django.urls import path
-from rest_framework_simplejwt.views import (TokenObtainPairView,
-                                            TokenRefreshView)
+from rest_framework_simplejwt.views import TokenRefreshView
 
-from .views import UserProfileView, UserRegistrationView
+from .views import (AccountDeletionStatusView, LoginView, TelegramLinkView,
+                    UserProfileView, UserRegistrationView)
 
 urlpatterns = [
     path("register/", UserRegistrationView.as_view(), name="register"),
-    path("login/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
+    path("login/", LoginView.as_view(), name="token_obtain_pair"),
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("profile/", UserProfileView.as_view(), name="profile"),
+    path("profile/telegram-link/", TelegramLinkView.as_view(), name="telegram_link"),
+    path(
+        "deletions/<str:token>/",
+        AccountDeletionStatusView.as_view(),
+        name="account_deletion",
+    ),
 ]
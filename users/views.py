@@ -1,9 +1,21 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from drf_spectacular.utils import extend_schema, extend_schema_view
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.views import APIView
+from rest_framework_simplejwt.views import TokenObtainPairView
 
-from .serializers import (UserRegistrationSerializer, UserSerializer,
-                          UserWithTokensSerializer)
+from bot.linking import create_link_token, link_url
+
+from .deletion import (cancel_account_deletion, deletion_progress,
+                       start_account_deletion)
+from .serializers import (AccountDeletionSerializer,
+                          AccountDeletionStartSerializer,
+                          TelegramLinkSerializer, UserRegistrationSerializer,
+                          UserSerializer, UserWithTokensSerializer)
+from .tasks import delete_account
 
 User = get_user_model()
 
@@ -12,6 +24,7 @@ class UserRegistrationView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserRegistrationSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_scope = "register"
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -24,9 +37,68 @@ class UserRegistrationView(generics.CreateAPIView):
         return Response(user_data, status=status.HTTP_201_CREATED)
 
 
-class UserProfileView(generics.RetrieveAPIView):
+class LoginView(TokenObtainPairView):
+    """Получение JWT; проверка пароля дорогая (PBKDF2), поэтому с лимитом"""
+
+    throttle_scope = "login"
+
+
+@extend_schema_view(
+    delete=extend_schema(responses={202: AccountDeletionStartSerializer})
+)
+class UserProfileView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
         return self.request.user
+
+    def destroy(self, request, *args, **kwargs):
+        """Аккаунт отключается сразу, данные удаляет задача Celery"""
+        user = self.get_object()
+        token = start_account_deletion(user)
+        try:
+            delete_account.delay(user.pk, token)
+        except Exception:
+            cancel_account_deletion(user, token)
+            raise
+        return Response(
+            {
+                **deletion_progress(token),
+                "status_url": reverse(
+                    "account_deletion", args=[token], request=request
+                ),
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class AccountDeletionStatusView(APIView):
+    """Ход удаления аккаунта; токен из ответа на DELETE профиля"""
+
+    permission_classes = [permissions.AllowAny]
+
+    @extend_schema(responses={200: AccountDeletionSerializer, 404: None})
+    def get(self, request, token):
+        progress = deletion_progress(token)
+        if progress is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        return Response(progress)
+
+
+class TelegramLinkView(APIView):
+    """Одноразовый токен для привязки Telegram командой /start <токен>"""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(request=None, responses={201: TelegramLinkSerializer})
+    def post(self, request):
+        token = create_link_token(request.user)
+        return Response(
+            {
+                "token": token,
+                "url": link_url(token),
+                "expires_in": settings.TELEGRAM_LINK_TTL,
+            },
+            status=status.HTTP_201_CREATED,
+        )